@@ -34,6 +34,15 @@ class AppConfig:
             "ssh_ip": "",
             "ssh_psw": "",
             "ssh_port": "",
+            "ssh_profile": "default",
+            "bulk_rate_limit": 0,
+            "bulk_yield_rate": 1,
+            "jump_host": "",
+            "jump_psw": "",
+            "fleet_hosts": "",
+            "tree_excludes": ".*, __pycache__, *venv*, *wandb*",
+            "tree_max_depth": 8,
+            "tree_dir_cap": 500,
             "git_url": "",
             "git_pat": "",
             "wandb_user": "",
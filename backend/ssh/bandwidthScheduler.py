@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import threading
+import time
+from collections import deque
+
+# Channel classes. Interactive traffic is never delayed; bulk traffic is paced.
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BULK = "bulk"
+
+# Bulk channels slow down to the yield rate for this long after something was typed into the shell
+INTERACTIVE_HOLD = 1.0
+
+# Seconds of data a bulk channel may have in flight. Everything inside the window is
+# queued ahead of shell packets on the shared TCP connection, so it bounds echo delay.
+BULK_WINDOW_SECONDS = 0.05
+MIN_BULK_WINDOW = 64 * 1024
+MAX_BULK_WINDOW = 2 * 1024 * 1024
+
+# Throughput is averaged over this many trailing seconds
+RATE_WINDOW = 2.0
+
+# Finished channels stay in snapshot() for a while so short transfers are still visible
+HISTORY_SIZE = 8
+
+# Shown in settings, in MB/s; 0 means no cap
+RATE_CHOICES = [(0, "Unlimited"), (1, "1 MB/s"), (2, "2 MB/s"), (5, "5 MB/s"),
+                (10, "10 MB/s"), (25, "25 MB/s"), (50, "50 MB/s"), (100, "100 MB/s")]
+
+MB = 1024 * 1024
+
+
+class TokenBucket:
+    """Blocking token bucket; a rate of 0 lets everything through."""
+
+    def __init__(self, rate=0, burst_seconds=0.25):
+        self.rate = rate
+        self.burst_seconds = burst_seconds
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = rate
+
+    def consume(self, amount):
+        """Takes amount bytes, sleeping until the bucket has refilled enough to cover them."""
+        with self._lock:
+            now = time.monotonic()
+            if not self.rate:
+                self._stamp = now
+                return
+            burst = self.rate * self.burst_seconds
+            self._tokens = min(self._tokens + (now - self._stamp) * self.rate, burst)
+            self._stamp = now
+            # Going negative is allowed; the debt is paid back by sleeping
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+
+class ChannelMeter:
+    """Byte counter for one channel with a trailing-window rate."""
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.total_bytes = 0
+        self.started = time.monotonic()
+        self.closed = False
+        self._samples = deque()
+        self._lock = threading.Lock()
+
+    def add(self, amount):
+        now = time.monotonic()
+        with self._lock:
+            self.total_bytes += amount
+            self._samples.append((now, amount))
+            self._prune(now)
+
+    def _prune(self, now):
+        while self._samples and now - self._samples[0][0] > RATE_WINDOW:
+            self._samples.popleft()
+
+    def rate(self):
+        """Bytes per second over the last RATE_WINDOW seconds while open."""
+        now = time.monotonic()
+        with self._lock:
+            if self.closed:
+                # Average over the channel's life, so a finished transfer still shows its speed
+                last = self._samples[-1][0] if self._samples else self.started
+                return self.total_bytes / max(last - self.started, 1e-3)
+            self._prune(now)
+            window = min(RATE_WINDOW, max(now - self.started, 1e-3))
+            return sum(amount for _, amount in self._samples) / window
+
+
+class BandwidthScheduler:
+    """
+    Shares one transport between the interactive shell and bulk transfers. Every
+    channel reports what it reads to a meter; bulk channels are additionally paced
+    by a token bucket, which drops to the yield rate right after input is sent to the
+    shell, so its echo isn't queued behind bulk data. Output streaming back from a long
+    command does not count; otherwise a chatty training run would throttle every download.
+    Pacing the reader is enough: paramiko stops extending the channel window, so
+    the server stops sending instead of piling data in front of shell packets.
+    """
+
+    def __init__(self, bulk_rate=0, yield_rate=1):
+        # Caps in MB/s; 0 means unlimited
+        self.bulk_rate = bulk_rate
+        self.yield_rate = yield_rate
+        self._bucket = TokenBucket(self._cap(bulk_rate))
+        self._last_interactive = 0.0
+        self._meters = []
+        self._history = deque(maxlen=HISTORY_SIZE)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cap(rate_mb):
+        try:
+            return float(rate_mb or 0) * MB
+        except (TypeError, ValueError):
+            return 0.0
+
+    # ---- meters ----
+    def open_meter(self, name, kind=BACKGROUND):
+        meter = ChannelMeter(name, kind)
+        with self._lock:
+            self._meters.append(meter)
+        return meter
+
+    def shared_meter(self, name, kind):
+        """Returns the open meter with this name, creating it if needed (e.g. the shell across reconnects)."""
+        with self._lock:
+            for meter in self._meters:
+                if meter.name == name:
+                    return meter
+        return self.open_meter(name, kind)
+
+    def close_meter(self, meter):
+        meter.closed = True
+        with self._lock:
+            if meter in self._meters:
+                self._meters.remove(meter)
+                self._history.append(meter)
+
+    def snapshot(self):
+        """One dict per open channel, then recently closed ones."""
+        with self._lock:
+            meters = list(self._meters) + list(reversed(self._history))
+        return [{"name": meter.name, "kind": meter.kind, "bytes": meter.total_bytes,
+                 "rate": meter.rate(), "open": not meter.closed} for meter in meters]
+
+    # ---- scheduling ----
+    def note_interactive(self):
+        """Called by the paths that send to the shell (commands, Ctrl+C), not for output read from it."""
+        self._last_interactive = time.monotonic()
+
+    def interactive_busy(self):
+        return time.monotonic() - self._last_interactive < INTERACTIVE_HOLD
+
+    def current_bulk_rate(self):
+        """Bytes per second a bulk channel may use right now; 0 means unlimited."""
+        cap = self._cap(self.bulk_rate)
+        if self.interactive_busy():
+            yield_cap = self._cap(self.yield_rate)
+            if yield_cap:
+                cap = min(cap, yield_cap) if cap else yield_cap
+        return cap
+
+    def record(self, meter, amount):
+        """Counts bytes read from a channel, pacing the caller if it is a bulk channel."""
+        meter.add(amount)
+        if meter.kind == BULK:
+            self._bucket.set_rate(self.current_bulk_rate())
+            self._bucket.consume(amount)
+
+    def bulk_window(self):
+        """Receive window for a new bulk channel, sized to BULK_WINDOW_SECONDS at the cap; None when uncapped."""
+        cap = self._cap(self.bulk_rate)
+        if not cap:
+            return None
+        return int(min(max(cap * BULK_WINDOW_SECONDS, MIN_BULK_WINDOW), MAX_BULK_WINDOW))
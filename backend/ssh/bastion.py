@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import os
+import threading
+
+import paramiko
+
+from .transportProfiles import open_socket
+
+# Key files ssh itself tries when no IdentityFile is configured
+DEFAULT_KEY_FILES = ("id_rsa", "id_ecdsa", "id_ed25519", "id_dsa")
+# A key file's type isn't known up front, so each is tried in turn
+KEY_CLASSES = (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey)
+
+
+def key_files(host=None):
+    """IdentityFile entries from ~/.ssh/config for host, then the default ~/.ssh/id_* files that exist."""
+    paths = []
+    config_path = os.path.expanduser("~/.ssh/config")
+    if host and os.path.isfile(config_path):
+        try:
+            config = paramiko.SSHConfig.from_path(config_path).lookup(host)
+            paths.extend(os.path.expanduser(path) for path in config.get("identityfile", []))
+        except Exception:
+            pass
+    paths.extend(os.path.expanduser(f"~/.ssh/{name}") for name in DEFAULT_KEY_FILES)
+    return [path for path in dict.fromkeys(paths) if os.path.isfile(path)]
+
+
+def load_keys(host=None, passphrase=None):
+    """Yields the keys in key_files(host); encrypted ones are tried with passphrase, unreadable ones skipped."""
+    for path in key_files(host):
+        for key_class in KEY_CLASSES:
+            try:
+                yield key_class.from_private_key_file(path, passphrase)
+                break
+            except (paramiko.SSHException, OSError, ValueError):
+                continue
+
+
+def authenticate(transport, user, password=None, host=None):
+    """
+    Password auth when one is set, then every key held by the local agent, then the
+    key files ssh would use for host (as SSHClient.connect did before transports
+    were dialed by hand).
+    """
+    if password:
+        try:
+            transport.auth_password(user, password)
+            return
+        except paramiko.AuthenticationException:
+            # The host may take keys only, or the password may be a key passphrase
+            pass
+
+    keys = list(paramiko.Agent().get_keys())
+    for key in keys + list(load_keys(host, password)):
+        try:
+            transport.auth_publickey(user, key)
+            return
+        except paramiko.AuthenticationException:
+            continue
+    raise paramiko.AuthenticationException("Password, agent keys and ~/.ssh key files were all rejected"
+                                           if password else "No password set and no key was accepted")
+
+
+def parse_host_spec(spec, default_user, default_port=22):
+    """Splits an ssh -J style "[user@]host[:port]" into (user, host, port); None for an empty spec."""
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    user, _, hostport = spec.rpartition("@")
+    host, _, port = hostport.partition(":")
+    return user or default_user, host, int(port or default_port)
+
+
+def open_tunnel(transport, host, port, timeout=10):
+    """Channel to host:port as seen from the bastion; usable as the sock of a paramiko.Transport."""
+    return transport.open_channel("direct-tcpip", (host, int(port)), ("127.0.0.1", 0), timeout=timeout)
+
+
+class BastionPool:
+    """
+    Authenticated transports to jump hosts, shared by every SSHManager that hops
+    through the same (user, host, port). Each target connection is a direct-tcpip
+    channel on the shared transport, so only the first one pays the bastion's
+    handshake. A transport is closed when its last user releases it.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, user, host, port, password=None, timeout=10, profile=None):
+        """Returns (key, transport), dialing and authenticating only if no live transport is cached.
+        Pass both back to release()."""
+        key = (user, host, int(port))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["transport"].is_active():
+                entry["users"] += 1
+                return key, entry["transport"]
+            if entry:
+                entry["transport"].close()
+
+            # The target's channel window is this transport's window, so size it for the profile
+            sock, _ = open_socket(host, port, timeout=timeout, profile=profile)
+            if profile:
+                transport = paramiko.Transport(sock, default_window_size=profile.window_size,
+                                               default_max_packet_size=profile.max_packet_size)
+                profile.apply_transport(transport)
+            else:
+                transport = paramiko.Transport(sock)
+            try:
+                transport.start_client(timeout=timeout)
+                authenticate(transport, user, password, host)
+            except Exception:
+                transport.close()
+                self._entries.pop(key, None)
+                raise
+            self._entries[key] = {"transport": transport, "users": 1}
+            return key, transport
+
+    def release(self, key, transport):
+        with self._lock:
+            entry = self._entries.get(key)
+            # A dead transport may already have been replaced; its users hold no count on the new one
+            if not entry or entry["transport"] is not transport:
+                return
+            entry["users"] -= 1
+            if entry["users"] <= 0:
+                entry["transport"].close()
+                del self._entries[key]
+
+
+# Shared by every SSHManager in the process
+BASTIONS = BastionPool()
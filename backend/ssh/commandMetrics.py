@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+METRICS_PATH = os.path.join(os.path.expanduser("~"), ".easyssh", "metrics.jsonl")
+
+# Records kept in memory for the diagnostics panel; the file keeps everything up to MAX_FILE_BYTES
+MAX_RECORDS = 1000
+MAX_FILE_BYTES = 5 * 1024 * 1024
+
+# Timings summarized per command kind
+TIMING_FIELDS = ["queue_wait_ms", "send_ms", "ttfb_ms", "total_ms", "ui_ms", "mb_per_s"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _ms(start, end):
+    return (end - start) * 1000 if start is not None and end is not None else None
+
+
+class CommandMetrics:
+    """
+    Timeline of one command. Splitting it up tells where time went:
+    send_ms is channel setup and the request round trip (network), ttfb_ms is
+    from the send until the first byte came back (remote process start plus one
+    RTT; on the shell, until its start marker, since the echo arrives first),
+    and ui_ms is from the first byte until the UI was handed any output.
+    """
+
+    def __init__(self, command, kind):
+        # Only the first line: batches and scripts can run to many lines
+        self.command = command.split("\n", 1)[0][:120]
+        self.kind = kind
+        self.queue_wait_ms = 0.0
+        self.started = None
+        self.sent = None
+        self.first_byte = None
+        self.first_ui = None
+        self.finished = None
+        self.bytes = 0
+        self.chunks = 0
+        self.exit_status = None
+
+    def mark_started(self):
+        self.started = time.perf_counter()
+
+    def mark_sent(self):
+        self.sent = time.perf_counter()
+
+    def mark_first_byte(self):
+        if self.first_byte is None:
+            self.first_byte = time.perf_counter()
+
+    def add_chunk(self, size):
+        self.bytes += size
+        self.chunks += 1
+
+    def mark_ui(self):
+        if self.first_ui is None:
+            self.first_ui = time.perf_counter()
+
+    def mark_finished(self, exit_status):
+        self.finished = time.perf_counter()
+        self.exit_status = exit_status
+
+    def to_dict(self):
+        streaming = _ms(self.first_byte, self.finished)
+        return {
+            "time": time.time(),
+            "command": self.command,
+            "kind": self.kind,
+            "queue_wait_ms": self.queue_wait_ms,
+            "send_ms": _ms(self.started, self.sent),
+            "ttfb_ms": _ms(self.sent, self.first_byte),
+            "total_ms": _ms(self.started, self.finished),
+            "ui_ms": _ms(self.first_byte, self.first_ui),
+            "bytes": self.bytes,
+            "chunks": self.chunks,
+            "mb_per_s": self.bytes / streaming * 1000 / (1024 * 1024) if streaming else None,
+            "exit_status": self.exit_status,
+        }
+
+
+class MetricsRecorder:
+    """Keeps recent command metrics in memory and appends each one to a JSON lines file."""
+
+    def __init__(self, path=METRICS_PATH, max_records=MAX_RECORDS):
+        self.path = path
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, metrics):
+        entry = metrics.to_dict()
+        with self._lock:
+            self._records.append(entry)
+            if self.path:
+                self._append(entry)
+        return entry
+
+    def _append(self, entry):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_FILE_BYTES:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Metrics write failed: {e}")
+
+    def records(self, kind=None):
+        with self._lock:
+            return [entry for entry in self._records if kind is None or entry["kind"] == kind]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        """{kind: {"count": n, field: {"p50", "p90", "p99"}}} over the in-memory records."""
+        by_kind = {}
+        for entry in self.records():
+            by_kind.setdefault(entry["kind"], []).append(entry)
+
+        summary = {}
+        for kind, entries in by_kind.items():
+            stats = {"count": len(entries)}
+            for field in TIMING_FIELDS:
+                values = [entry[field] for entry in entries if entry[field] is not None]
+                if values:
+                    stats[field] = {"p50": percentile(values, 50), "p90": percentile(values, 90),
+                                    "p99": percentile(values, 99)}
+            summary[kind] = stats
+        return summary
+
+    def export(self, path, kind=None):
+        """Writes the in-memory records as JSON lines and returns how many were written."""
+        entries = self.records(kind)
+        with open(path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        return len(entries)
+
+
+# Shared by every worker in the process
+METRICS = MetricsRecorder()
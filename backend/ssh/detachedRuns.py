@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import re
+import shlex
+import time
+
+# Relative to the remote home directory, which is where exec channels start
+RUNS_DIR = ".easyssh/runs"
+
+LAUNCH_MODES = ["tmux", "nohup"]
+
+
+def make_run_name(command):
+    """Readable, shell-safe name: the script's stem plus a timestamp."""
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        # Unbalanced quotes; the shell will report those, the name only needs the words
+        words = [word.strip("'\"") for word in command.split()]
+    scripts = [word for word in words if word.endswith(".py")]
+    target = scripts[0] if scripts else (words[0] if words else "run")
+    stem = re.sub(r"\.py$", "", target.rsplit("/", 1)[-1])
+    stem = re.sub(r"[^A-Za-z0-9_-]", "-", stem)[:32] or "run"
+    return f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def log_path(name):
+    return f"{RUNS_DIR}/{name}.log"
+
+
+def detached_command(command, name, mode="tmux"):
+    """
+    Shell command that starts `command` in the current directory, detached from the
+    SSH session, with stdout/stderr going to RUNS_DIR/name.log and the exit status
+    to name.exit. "tmux" falls back to nohup when tmux is not installed.
+    """
+    runs = f'"$HOME/{RUNS_DIR}"'
+    log = f'"$HOME/{log_path(name)}"'
+    exit_file = f'"$HOME/{RUNS_DIR}/{name}.exit"'
+    # Subshell so an `exit` in the command still records its status
+    inner = f"( {command} ); echo $? > {exit_file}"
+    # Unbuffered so the log (and anything tailing it) sees output as it is printed
+    runner = f"env PYTHONUNBUFFERED=1 sh -c {shlex.quote(inner)}"
+
+    nohup = (f"{{ nohup {runner} > {log} 2>&1 < /dev/null & "
+             f"echo $! > \"$HOME/{RUNS_DIR}/{name}.pid\"; }}")
+    tmux = f"tmux new-session -d -s easyssh-{name} {shlex.quote(f'{runner} > {log} 2>&1')}"
+
+    launch = nohup if mode == "nohup" else f"if command -v tmux >/dev/null 2>&1; then {tmux}; else {nohup}; fi"
+    return f"mkdir -p {runs} && {launch} && echo \"Started {name}, logging to ~/{log_path(name)}\""
+
+
+def list_runs_command():
+    """Prints one "name status" line per run, newest first; status is running, stopped or "exit N"."""
+    return (f"cd {RUNS_DIR} 2>/dev/null && for f in $(ls -t *.log 2>/dev/null); do "
+            "n=${f%.log}; "
+            "if [ -f \"$n.exit\" ]; then s=\"exit $(cat \"$n.exit\")\"; "
+            "elif tmux has-session -t \"easyssh-$n\" 2>/dev/null "
+            "|| { [ -f \"$n.pid\" ] && kill -0 \"$(cat \"$n.pid\")\" 2>/dev/null; }; then s=running; "
+            "else s=stopped; fi; "
+            "echo \"$n $s\"; done")
+
+
+def parse_runs(output):
+    runs = []
+    for line in output.splitlines():
+        parts = line.strip().split(" ", 1)
+        if len(parts) == 2:
+            runs.append((parts[0], parts[1]))
+    return runs
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .bastion import parse_host_spec
+from .sshManager import SSHManager, SSHStreamWorker
+
+# Upper bound on parallel connects/commands; each host needs its own thread while it streams
+MAX_FLEET_WORKERS = 32
+
+
+def parse_fleet_hosts(text):
+    """Hosts separated by commas, spaces or newlines, each in "[user@]host[:port]" form."""
+    return [spec for spec in text.replace(",", " ").split() if spec]
+
+
+class HostOutput:
+    """Prefixes every complete line from one host, holding back a partial last line."""
+
+    def __init__(self, label):
+        self.prefix = f"[{label}] "
+        self.partial = ""
+
+    def feed(self, text):
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        return "".join(f"{self.prefix}{line}\n" for line in lines)
+
+    def flush(self):
+        text, self.partial = self.partial, ""
+        return f"{self.prefix}{text}\n" if text.strip() else ""
+
+
+class FleetResult:
+    def __init__(self, host, exit_status=None, elapsed_ms=0.0, error=None):
+        self.host = host
+        self.exit_status = exit_status
+        self.elapsed_ms = elapsed_ms
+        self.error = error
+
+    def summary(self, width=0):
+        if self.error:
+            return f"{self.host.ljust(width)}  failed - {self.error}"
+        return f"{self.host.ljust(width)}  exit {self.exit_status} in {self.elapsed_ms:.0f} ms"
+
+
+class FleetManager:
+    """
+    One SSHManager per host, connected and driven in parallel from a thread pool, so
+    a command on N hosts costs one round trip instead of N sequential ones. Connection
+    settings other than the host are shared, including the jump host, whose transport
+    is itself shared by every node.
+    """
+
+    def __init__(self, hosts, user, port, password=None, profile=None, jump_host=None, jump_password=None):
+        self.hosts = list(hosts)
+        self.user = user
+        self.port = port
+        self.password = password
+        self.profile = profile
+        self.jump_host = jump_host
+        self.jump_password = jump_password
+        self.managers = {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(len(self.hosts), MAX_FLEET_WORKERS)),
+                                        thread_name_prefix="fleet")
+
+    def _build_manager(self, spec):
+        user, host, port = parse_host_spec(spec, self.user, self.port or 22)
+        return SSHManager(host, user, port, self.password, profile=self.profile,
+                          jump_host=self.jump_host, jump_password=self.jump_password)
+
+    def connect_all(self):
+        """Connects every host not already up; returns {host: (success, message)}."""
+        def connect(spec):
+            manager = self.managers.get(spec)
+            if manager and manager.is_active():
+                return True, "Already connected"
+            manager = self._build_manager(spec)
+            success, msg = manager.connect()
+            if success:
+                self.managers[spec] = manager
+            return success, msg
+
+        futures = {spec: self._pool.submit(connect, spec) for spec in self.hosts}
+        return {spec: future.result() for spec, future in futures.items()}
+
+    def run(self, command, on_output, should_stop=lambda: False):
+        """
+        Runs command on every connected host at once, in each shell's starting
+        directory. on_output(host, text) is called from pool threads as output
+        arrives. Returns one FleetResult per host, in host order.
+        """
+        def run_one(spec):
+            manager = self.managers.get(spec)
+            if manager is None or not manager.is_active():
+                return FleetResult(spec, error="not connected")
+            start = time.perf_counter()
+            remote = f"cd {shlex.quote(manager.cwd)} && {command}" if manager.cwd else command
+            try:
+                stream = manager.stream_exec(remote)
+                while True:
+                    if should_stop():
+                        stream.close()
+                        return FleetResult(spec, error="stopped")
+                    try:
+                        chunk = next(stream)
+                    except StopIteration as done:
+                        status = done.value
+                        break
+                    on_output(spec, chunk)
+            except Exception as e:
+                return FleetResult(spec, error=str(e), elapsed_ms=(time.perf_counter() - start) * 1000)
+            if should_stop():
+                return FleetResult(spec, error="stopped")
+            return FleetResult(spec, status, (time.perf_counter() - start) * 1000)
+
+        futures = [self._pool.submit(run_one, spec) for spec in self.hosts]
+        return [future.result() for future in futures]
+
+    def close(self):
+        for manager in self.managers.values():
+            manager.close()
+        self.managers = {}
+        self._pool.shutdown(wait=False)
+
+
+class SSHFleetWorker(SSHStreamWorker):
+    """Connects the fleet if needed and runs one command on every host, merging output with host prefixes."""
+
+    def __init__(self, fleet, command, spool=None):
+        super().__init__(None, command, use_shell=False, spool=spool)
+        self.fleet = fleet
+        # Per-host timings are in results; one command timeline does not fit N hosts
+        self.metrics = None
+        self.results = []
+        self._outputs = {spec: HostOutput(spec) for spec in fleet.hosts}
+        self._output_lock = threading.Lock()
+
+    def _emit(self, text):
+        if text:
+            if self.spool:
+                self.spool.append(text)
+            self._buffer_output(text)
+
+    def _host_output(self, spec, chunk):
+        with self._output_lock:
+            self._emit(self._outputs[spec].feed(chunk))
+
+    def stop(self):
+        super().stop()
+        # Closing the channels wakes hosts blocked waiting for output
+        for manager in list(self.fleet.managers.values()):
+            for channel in list(manager.exec_channels):
+                channel.close()
+
+    def run(self):
+        try:
+            for spec, (success, msg) in self.fleet.connect_all().items():
+                if not success:
+                    self._emit(f"[{spec}] connect failed: {msg}\n")
+
+            self.results = self.fleet.run(self.command, self._host_output, lambda: not self._is_running)
+
+            with self._output_lock:
+                for output in self._outputs.values():
+                    self._emit(output.flush())
+            width = max(len(result.host) for result in self.results) if self.results else 0
+            self._emit("\n" + "".join(f"{result.summary(width)}\n" for result in self.results))
+            failed = [result for result in self.results if result.error or result.exit_status]
+            self.exit_code = 1 if failed else 0
+        except Exception as e:
+            self.exit_code = 1
+            self.failed.emit(str(e) or type(e).__name__)
+        finally:
+            # Marks the spool complete, which is what lets the console close it later
+            if self.spool:
+                self.spool.finish()
+            self._stream_done = True
+            self._flush_requested.emit()
+            self.finished.emit()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import heapq
+import itertools
+import time
+from collections import deque
+
+# Lower value runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+
+class CommandJob:
+    _ids = itertools.count(1)
+
+    def __init__(self, command, priority=PRIORITY_NORMAL, key=None, **options):
+        self.job_id = next(CommandJob._ids)
+        self.command = command
+        self.priority = priority
+        # Jobs sharing a key are merged while pending and never run at the same time
+        self.key = key
+        self.options = options
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.cancelled = False
+
+    def wait_time(self):
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+
+class JobQueue:
+    def __init__(self, max_running=1):
+        self.max_running = max_running
+        self._heap = []
+        self._pending = {}
+        self._pending_keys = {}
+        self._running = {}
+        self._seq = itertools.count()
+        self._waits = deque(maxlen=200)
+
+    def push(self, job):
+        """Queues a job, or returns the already pending job with the same key."""
+        existing = self._pending_keys.get(job.key) if job.key is not None else None
+        if existing is not None:
+            if job.priority < existing.priority:
+                existing.priority = job.priority
+                heapq.heappush(self._heap, (existing.priority, next(self._seq), existing))
+            return existing
+
+        self._pending[job.job_id] = job
+        if job.key is not None:
+            self._pending_keys[job.key] = job
+        heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+        return job
+
+    def pop(self):
+        """Returns the next runnable job and marks it running, or None."""
+        if len(self._running) >= self.max_running:
+            return None
+
+        running_keys = {job.key for job in self._running.values() if job.key is not None}
+        deferred = []
+        chosen = None
+
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            # Stale entry left behind by cancel() or a priority bump
+            if job.job_id not in self._pending or entry[0] != job.priority:
+                continue
+            if job.key is not None and job.key in running_keys:
+                deferred.append(entry)
+                continue
+            chosen = job
+            break
+
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+
+        if chosen is None:
+            return None
+
+        self._remove_pending(chosen)
+        chosen.started_at = time.monotonic()
+        self._waits.append(chosen.wait_time())
+        self._running[chosen.job_id] = chosen
+        return chosen
+
+    def finish(self, job):
+        self._running.pop(job.job_id, None)
+
+    def cancel(self, job_id):
+        job = self._pending.get(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        self._remove_pending(job)
+        return True
+
+    def cancel_all(self):
+        pending = list(self._pending)
+        for job_id in pending:
+            self.cancel(job_id)
+        return len(pending)
+
+    def pending_jobs(self):
+        return sorted(self._pending.values(), key=lambda job: (job.priority, job.enqueued_at))
+
+    def depth(self):
+        return len(self._pending)
+
+    def running_count(self):
+        return len(self._running)
+
+    def stats(self):
+        """Queue depth plus wait times of recently started jobs, in seconds."""
+        waits = list(self._waits)
+        oldest = max((job.wait_time() for job in self._pending.values()), default=0.0)
+        return {
+            "depth": self.depth(),
+            "running": self.running_count(),
+            "mean_wait": sum(waits) / len(waits) if waits else 0.0,
+            "max_wait": max(waits, default=0.0),
+            "oldest_pending": oldest,
+        }
+
+    def _remove_pending(self, job):
+        self._pending.pop(job.job_id, None)
+        if job.key is not None and self._pending_keys.get(job.key) is job:
+            del self._pending_keys[job.key]
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import bisect
+import glob
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import uuid
+from array import array
+
+SPOOL_DIR = os.path.join(os.path.expanduser("~"), ".easyssh", "spool")
+
+# One index entry per this many lines; finding a line scans at most this many newlines
+LINE_STRIDE = 1024
+
+# Oldest spool files beyond this count are deleted when a new one is created
+MAX_SPOOL_FILES = 100
+
+_OFFSET = struct.Struct("<Q")
+
+
+class OutputSpool:
+    """
+    Append-only on-disk copy of one command's output. A sidecar .idx file holds the
+    byte offset of every LINE_STRIDE-th line, so any line can be found without
+    reading the file from the start. Reads go through a read-only mmap.
+    """
+
+    def __init__(self, path, command=""):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.command = command
+        self._lock = threading.Lock()
+
+        self._file = open(path, "ab")
+        self._index_file = open(self.index_path, "ab")
+        self._size = self._file.tell()
+        # Start offsets of lines 0, LINE_STRIDE, 2 * LINE_STRIDE, ...
+        self._offsets = array("Q", [0])
+        self._lines = 0
+        self._dirty = False
+
+        self._reader = open(path, "rb")
+        self._map = None
+        self._map_size = 0
+
+        if self._size:
+            self._load_index()
+
+    def _load_index(self):
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % _OFFSET.size
+        self._offsets.extend(offset for (offset,) in _OFFSET.iter_unpack(data[:usable]))
+        # Count the lines written after the last indexed offset
+        view = self._view()
+        self._lines = (len(self._offsets) - 1) * LINE_STRIDE + view[self._offsets[-1]:].count(b"\n")
+
+    # ---- writing ----
+    def append(self, text):
+        data = text.encode("utf-8", errors="replace")
+        if not data:
+            return
+        with self._lock:
+            self._file.write(data)
+            newlines = data.count(b"\n")
+            if self._lines % LINE_STRIDE + newlines < LINE_STRIDE:
+                # Fast path: no index boundary inside this chunk
+                self._lines += newlines
+            else:
+                pos = data.find(b"\n")
+                while pos != -1:
+                    self._lines += 1
+                    if self._lines % LINE_STRIDE == 0:
+                        offset = self._size + pos + 1
+                        self._offsets.append(offset)
+                        self._index_file.write(_OFFSET.pack(offset))
+                    pos = data.find(b"\n", pos + 1)
+            self._size += len(data)
+            self._dirty = True
+
+    def finish(self):
+        """Flushes and closes the write side; the spool stays readable."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                self._index_file.close()
+            self._dirty = False
+
+    def is_finished(self):
+        """True once the writer has called finish(); only then is the output complete."""
+        return self._file.closed
+
+    def close(self):
+        self.finish()
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._reader.close()
+
+    # ---- reading ----
+    def _view(self):
+        """Returns an mmap covering everything written so far, remapping only after growth."""
+        if self._dirty:
+            self._file.flush()
+            self._index_file.flush()
+            self._dirty = False
+        if self._size and self._size != self._map_size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = len(self._map)
+        return self._map if self._map is not None else b""
+
+    def size(self):
+        return self._size
+
+    def line_count(self):
+        """Number of lines, counting an unterminated last line."""
+        with self._lock:
+            view = self._view()
+            partial = self._size and view[self._size - 1:self._size] != b"\n"
+            return self._lines + (1 if partial else 0)
+
+    def _line_offset(self, view, line):
+        if line <= 0:
+            return 0
+        block = min(line // LINE_STRIDE, len(self._offsets) - 1)
+        offset = self._offsets[block]
+        for _ in range(line - block * LINE_STRIDE):
+            pos = view.find(b"\n", offset, self._map_size)
+            if pos == -1:
+                return self._map_size
+            offset = pos + 1
+        return offset
+
+    def read_bytes(self, start, end):
+        with self._lock:
+            view = self._view()
+            return bytes(view[max(start, 0):min(end, self._map_size)])
+
+    def read_lines(self, first, count):
+        with self._lock:
+            view = self._view()
+            start = self._line_offset(view, first)
+            end = self._line_offset(view, first + count)
+            return bytes(view[start:end]).decode("utf-8", errors="replace")
+
+    def tail(self, max_bytes):
+        with self._lock:
+            view = self._view()
+            data = bytes(view[max(self._map_size - max_bytes, 0):self._map_size])
+        return data.decode("utf-8", errors="replace")
+
+    def line_at(self, offset):
+        """Line number containing a byte offset."""
+        with self._lock:
+            view = self._view()
+            block = bisect.bisect_right(self._offsets, offset) - 1
+            return block * LINE_STRIDE + view[self._offsets[block]:offset].count(b"\n")
+
+    def search(self, text, start=0, ignore_case=True):
+        """Returns the byte offset of the next match at or after start, or -1."""
+        needle = text.encode("utf-8")
+        with self._lock:
+            view = self._view()
+            if not self._map_size or not needle:
+                return -1
+            if not ignore_case:
+                return view.find(needle, start)
+            match = re.compile(re.escape(needle), re.IGNORECASE).search(view, start)
+            return match.start() if match else -1
+
+
+def create_spool(command):
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    prune_spools(MAX_SPOOL_FILES - 1)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.log"
+    return OutputSpool(os.path.join(SPOOL_DIR, name), command)
+
+
+def prune_spools(keep):
+    logs = sorted(glob.glob(os.path.join(SPOOL_DIR, "*.log")), key=os.path.getmtime)
+    for path in logs[:max(len(logs) - keep, 0)]:
+        for stale in (path, path + ".idx"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
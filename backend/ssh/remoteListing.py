@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import fnmatch
+import shlex
+import time
+from collections import OrderedDict
+
+# Never shown in the file tree or walked by the scan (fnmatch patterns). A pattern
+# without "/" matches entry names; one with "/" matches the path relative to home.
+DEFAULT_EXCLUDES = [".*", "__pycache__", "*venv*", "*wandb*"]
+
+# Levels below home walked by the find scan (0 = unlimited)
+DEFAULT_MAX_DEPTH = 8
+
+# Entries shown per folder before the rest hide behind a "Show N more" item (0 = no limit)
+DEFAULT_DIR_CAP = 500
+
+# Directory listings kept before the least recently used ones are dropped
+MAX_CACHED_DIRS = 2000
+
+# SFTP mtimes have one second resolution: a listing taken within this many seconds of
+# the directory's last change could miss a second change in the same second, so it is not cached
+RACY_SECONDS = 2
+
+
+def parse_excludes(text):
+    """Patterns separated by commas or whitespace; empty falls back to DEFAULT_EXCLUDES."""
+    patterns = [pattern for pattern in str(text or "").replace(",", " ").split() if pattern]
+    return patterns or list(DEFAULT_EXCLUDES)
+
+
+def parse_limit(value, default):
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def is_excluded(name, excludes=DEFAULT_EXCLUDES, rel_path=None):
+    for pattern in excludes:
+        if "/" in pattern:
+            if rel_path is not None and fnmatch.fnmatchcase(rel_path, pattern):
+                return True
+        elif fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def build_find_command(excludes=DEFAULT_EXCLUDES, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    find over the current directory that prunes excluded entries, so it never walks
+    into them (a "-not -path" filter still visits every file below before dropping
+    it). Folders are printed with a trailing slash, which keeps folders cut off by
+    max_depth, or empty ones, from being shown as files. Needs GNU find for -printf.
+    """
+    parts = ["find . -mindepth 1"]
+    if max_depth:
+        parts.append(f"-maxdepth {int(max_depth)}")
+    if excludes:
+        tests = " -o ".join(f"-path {shlex.quote('./' + pattern)}" if "/" in pattern else f"-name {shlex.quote(pattern)}"
+                            for pattern in excludes)
+        parts.append(f"\\( {tests} \\) -prune -o")
+    parts.append("-type d -printf '%p/\\n' -o -print")
+    return " ".join(parts)
+
+
+class RemoteEntry:
+    __slots__ = ("name", "is_dir", "size", "mtime")
+
+    def __init__(self, name, is_dir, size=0, mtime=0):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+
+    def sort_key(self):
+        # Folders first, then alphabetical, like the tree has always shown them
+        return not self.is_dir, self.name.lower()
+
+
+class DirectoryCache:
+    """
+    Listings keyed by remote path. A listing stays valid while its directory's mtime
+    is unchanged, since creating, deleting or renaming an entry bumps that mtime.
+    Changes inside an entry (a file growing) do not, and are not tracked.
+    """
+
+    def __init__(self, max_dirs=MAX_CACHED_DIRS):
+        self.max_dirs = max_dirs
+        self._listings = OrderedDict()
+
+    def get(self, path, mtime):
+        cached = self._listings.get(path)
+        if cached is None or cached[0] != mtime:
+            return None
+        self._listings.move_to_end(path)
+        return cached[1]
+
+    def put(self, path, mtime, entries):
+        if time.time() - mtime < RACY_SECONDS:
+            self._listings.pop(path, None)
+            return
+        self._listings[path] = (mtime, entries)
+        self._listings.move_to_end(path)
+        while len(self._listings) > self.max_dirs:
+            self._listings.popitem(last=False)
+
+    def invalidate(self, path=None):
+        if path is None:
+            self._listings.clear()
+        else:
+            self._listings.pop(path, None)
+
+    def __len__(self):
+        return len(self._listings)
@@ -9,99 +9,784 @@ Email: sam.grouchnikov@gmail.com
 Status: Development
 """
 
+import codecs
+import os
+import posixpath
+import re
+import select
+import shlex
+import stat
+import threading
 import time
+import uuid
 
 import paramiko
-from PyQt6.QtCore import pyqtSignal, QThread
+from PyQt6.QtCore import pyqtSignal, QThread, QTimer
+from scp import SCPClient
+
+from .bandwidthScheduler import BandwidthScheduler, INTERACTIVE, BACKGROUND, BULK
+from .bastion import BASTIONS, authenticate, open_tunnel, parse_host_spec
+from .commandMetrics import CommandMetrics, METRICS
+from .remoteListing import DEFAULT_EXCLUDES, DirectoryCache, RemoteEntry, is_excluded
+from .transportProfiles import describe_buffers, get_profile, open_socket, recommend_profile
+
+# Prefix of the markers wrapped around every shell command. The markers are
+# printed with split printf arguments so the echoed command line never
+# contains the literal marker text.
+MARKER = "__EASYSSH"
+
+# Seconds between SSH-level keepalive packets
+KEEPALIVE_INTERVAL = 15
+
+# Receive sizes adapt between these bounds depending on how much data is waiting
+MIN_READ_SIZE = 4096
+MAX_READ_SIZE = 1024 * 1024
+
+# Remote loop behind stream_tail (GNU stat/tail). Each poll sends any new bytes as one
+# frame: a "__EASYSSH_TAIL inode offset length" header line followed by exactly length
+# bytes, padded with NULs if the file shrank mid-read. A new inode or a size below the
+# offset (rotation or truncation) restarts from byte 0. A fresh attach starts
+# {backlog} bytes before the end instead of replaying the whole file.
+TAIL_SCRIPT = """f={path}; ino={inode}; off={offset}
+while :; do
+  set -- $(stat -L -c '%i %s' "$f" 2>/dev/null)
+  if [ -n "$1" ]; then
+    if [ -z "$ino" ]; then ino=$1; off=$(($2 > {backlog} ? $2 - {backlog} : 0)); fi
+    if [ "$1" != "$ino" ] || [ "$2" -lt "$off" ]; then ino=$1; off=0; fi
+    if [ "$2" -gt "$off" ]; then
+      n=$(($2 - off))
+      printf '%s %s %s %s\\n' {marker}_TAIL "$ino" "$off" "$n"
+      {{ tail -c +$((off + 1)) "$f" | head -c "$n"; cat /dev/zero; }} | head -c "$n"
+      off=$2
+    fi
+  fi
+  sleep {interval}
+done"""
+
+# Seconds a background capture (tree scan, file read/save) may run before its channel is closed
+CAPTURE_TIMEOUT = 120
+
+# Streamed output is handed to the UI at most once per frame, or sooner once this much is buffered
+FLUSH_INTERVAL_MS = 33
+FLUSH_BYTES = 64 * 1024
+
+
+def collapse_progress_frames(text):
+    """
+    Keeps only the newest frame of every carriage-return progress line, e.g.
+    "10%\r20%\r30%" becomes "\r30%". CRLF line endings are left alone.
+    """
+    if "\r" not in text:
+        return text
+
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        crlf = i < len(lines) - 1 and line.endswith("\r")
+        body = line[:-1] if crlf else line
+        if "\r" not in body:
+            continue
+
+        frames = [frame for frame in body.split("\r") if frame]
+        body = "\r" + frames[-1] if frames else "\r"
+        lines[i] = body + "\r" if crlf else body
+
+    return "\n".join(lines)
+
+
+
+class CaptureResult:
+    """Outcome of SSHManager.run_capture; exit_status is None if the command timed out or the channel dropped."""
+
+    def __init__(self, command, stdout=b"", stderr=b"", exit_status=None, elapsed_ms=0.0, timed_out=False):
+        self.command = command
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_status = exit_status
+        self.elapsed_ms = elapsed_ms
+        self.timed_out = timed_out
+
+    @property
+    def text(self):
+        return self.stdout.decode("utf-8", errors="replace")
+
+    @property
+    def error_text(self):
+        return self.stderr.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self):
+        return self.exit_status == 0 and not self.timed_out
+
+    def describe_error(self):
+        if self.timed_out:
+            return f"timed out after {self.elapsed_ms / 1000:.1f} s"
+        return self.error_text.strip() or f"exit status {self.exit_status}"
 
 
 class SSHManager:
-    def __init__(self, host, user, port, password=None):
+    def __init__(self, host, user, port, password=None, profile=None, bulk_rate=0, yield_rate=1,
+                 jump_host=None, jump_password=None, tree_excludes=None):
         self.host = host
         self.user = user
         self.password = password
         self.port = port
-        self.client = None
+        # Optional "[user@]host[:port]" bastion; the target is reached through a tunnel on a shared transport
+        self.jump_host = jump_host
+        self.jump_password = jump_password
+        self._bastion = None
+        # Name of a TransportProfile; None keeps paramiko's defaults
+        self.profile = profile
+        self.transport = None
         self.channel = None
+        self.last_exit_status = None
+        # [(label, status)] of the steps the last stream_batch ran
+        self.batch_results = []
+        # One marker-wrapped script on the interactive shell at a time; reentrant for reconnect's restore
+        self._shell_lock = threading.RLock()
+        self.exec_channels = set()
+        # Milliseconds spent in each phase of the last connect()
+        self.connect_timings = {}
+        # Kernel socket buffers of the last direct connect(), as describe_buffers() reports them
+        self.socket_buffers = None
+        self._fixed_buffers = set()
+        # Shell state replayed after a reconnect. cwd is reported in-band by every
+        # command's end marker; home is the directory the shell started in.
+        self.cwd = None
+        self.home = None
+        self.session_env = {}
+        # Followed log files: path -> {"inode", "offset"}; kept across reconnects so tails resume
+        self.tail_state = {}
+        self.tail_channels = {}
+        # Meters every channel and paces bulk transfers (caps in MB/s, 0 = unlimited)
+        self.scheduler = BandwidthScheduler(bulk_rate, yield_rate)
+        # Lazily opened SFTP session for directory listings; paramiko's client is not
+        # safe to share between threads, so every request holds the lock
+        self._sftp = None
+        self._sftp_lock = threading.Lock()
+        self.sftp_unavailable = False
+        self.listings = DirectoryCache()
+        # Patterns hidden from listings; cached listings are already filtered with them
+        self.tree_excludes = list(tree_excludes or DEFAULT_EXCLUDES)
 
-    def connect(self):
-
+    def connect(self, timeout=10, shell_timeout=10):
+        """
+        Dials the host in explicit phases (TCP, key exchange, auth, shell) so each
+        one can be timed, and returns as soon as the shell answers a ready marker.
+        """
+        self.connect_timings = {}
+        self.socket_buffers = None
+        self._fixed_buffers = set()
         try:
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.client.connect(
-                hostname=self.host, port=self.port,
-                username=self.user, password=self.password, timeout=10
-            )
-            self.channel = self.client.invoke_shell()
-            time.sleep(1)
-            if self.channel.recv_ready():
-                self.channel.recv(9999)
-            return True, "Successfully connected"
+            phase_start = time.perf_counter()
+            profile = get_profile(self.profile)
+
+            jump = parse_host_spec(self.jump_host, self.user)
+            if jump:
+                # Reuses a cached bastion transport when one is up; only the first hop pays its handshake
+                self._bastion = BASTIONS.acquire(*jump, password=self.jump_password,
+                                                 timeout=timeout, profile=profile)
+                phase_start = self._record_phase("bastion", phase_start)
+                sock = open_tunnel(self._bastion[1], self.host, self.port, timeout=timeout)
+                phase_start = self._record_phase("tunnel", phase_start)
+            else:
+                # Buffers go on before connect(), where they still affect the window scale
+                sock, fixed = open_socket(self.host, self.port, timeout=timeout, profile=profile)
+                self._fixed_buffers = fixed
+                self.socket_buffers = describe_buffers(sock, fixed)
+                phase_start = self._record_phase("tcp", phase_start)
+
+            if profile:
+                self.transport = paramiko.Transport(sock, default_window_size=profile.window_size,
+                                                    default_max_packet_size=profile.max_packet_size)
+                profile.apply_transport(self.transport)
+            else:
+                self.transport = paramiko.Transport(sock)
+            self.transport.start_client(timeout=timeout)
+            self.transport.set_keepalive(KEEPALIVE_INTERVAL)
+            phase_start = self._record_phase("kex", phase_start)
+
+            self._authenticate()
+            phase_start = self._record_phase("auth", phase_start)
+
+            self.channel = self.transport.open_session(timeout=timeout)
+            self.channel.get_pty()
+            self.channel.invoke_shell()
+            self.home = self.cwd = self._wait_for_shell(shell_timeout)
+            self._record_phase("shell", phase_start)
+
+            phases = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.connect_timings.items())
+            if self.socket_buffers:
+                phases += f"; {self.socket_buffers}"
+            return True, f"Successfully connected ({phases})"
         except Exception as e:
+            self.close()
             return False, str(e)
 
+    def _record_phase(self, name, phase_start):
+        now = time.perf_counter()
+        self.connect_timings[name] = (now - phase_start) * 1000
+        return now
+
+    def _authenticate(self):
+        # Falls back to agent keys and the ~/.ssh key files for this host
+        authenticate(self.transport, self.user, self.password, self.host)
+
+    def _wait_for_shell(self, timeout):
+        """
+        Swallows the MOTD and initial prompt by waiting for a ready marker to echo back,
+        and returns the starting directory the marker carries.
+        """
+        token = uuid.uuid4().hex[:12]
+        ready_pattern = re.compile(re.escape(f"{MARKER}_READY_{token}:") + r"([^\r\n]*)\r?\n")
+        self.channel.send(f"printf '%s_%s:%s\\n' {MARKER}_READY {token} \"$PWD\"\n")
+
+        deadline = time.monotonic() + timeout
+        received = ""
+        while True:
+            match = ready_pattern.search(received)
+            if match:
+                return match.group(1)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.channel.closed:
+                raise TimeoutError(f"Shell did not become ready within {timeout} s")
+            if self._wait_readable(self.channel, remaining) and self.channel.recv_ready():
+                received += self.channel.recv(4096).decode('utf-8', errors='replace')
+
     def is_active(self):
-        if self.client and self.client.get_transport():
-            return self.client.get_transport().is_active()
+        if self.transport:
+            return self.transport.is_active()
         return False
 
-    def stream_command(self, command):
-        """Yields cleaned data by stripping echo and the trailing prompt."""
-        if not self.channel: return
+    def probe(self, timeout=5):
+        """Round-trips a channel open to catch links that died without the transport noticing."""
+        if not self.is_active():
+            return False
+        try:
+            channel = self.transport.open_session(timeout=timeout)
+            channel.close()
+            return True
+        except Exception:
+            return False
+
+    def measure_link(self, sample_bytes=4 * 1024 * 1024, rtt_samples=5):
+        """
+        Times channel opens (one round trip each) and a download of incompressible data,
+        and returns {"rtt_ms", "mb_per_s", "recommended"}.
+        """
+        rtts = []
+        for _ in range(rtt_samples):
+            start = time.perf_counter()
+            self.transport.open_session(timeout=10).close()
+            rtts.append((time.perf_counter() - start) * 1000)
+        rtt_ms = sorted(rtts)[len(rtts) // 2]
+
+        channel = self.transport.open_session(timeout=10)
+        try:
+            channel.exec_command(f"head -c {int(sample_bytes)} /dev/urandom")
+            start = time.perf_counter()
+            received = 0
+            for data in iter(lambda: channel.recv(MAX_READ_SIZE), b""):
+                received += len(data)
+            elapsed = time.perf_counter() - start
+        finally:
+            channel.close()
+
+        mb_per_s = received / max(elapsed, 1e-6) / (1024 * 1024)
+        if self.socket_buffers:
+            # Read again after the download, when autotuned buffers have grown to what the link needs
+            self.socket_buffers = describe_buffers(self.transport.sock, self._fixed_buffers)
+        return {"rtt_ms": rtt_ms, "mb_per_s": mb_per_s, "recommended": recommend_profile(rtt_ms, mb_per_s),
+                "socket_buffers": self.socket_buffers}
+
+    def reconnect(self):
+        """Drops the old transport, dials again and restores the working directory and exports."""
+        cwd = self.cwd
+        # Streams on the old channel end once it is closed, which frees the shell lock
+        self.close()
+        # Held until the session is restored, so no queued command runs in the wrong directory
+        with self._shell_lock:
+            success, msg = self.connect()
+            if success:
+                self.cwd = cwd or self.cwd
+                self.restore_session()
+        return success, msg
+
+    def restore_session(self):
+        steps = [f"export {name}={shlex.quote(str(value))}" for name, value in self.session_env.items()]
+        if self.cwd:
+            steps.append(f"cd {shlex.quote(self.cwd)}")
+        if steps:
+            for _ in self.stream_command("; ".join(steps)):
+                pass
+
+    @staticmethod
+    def _wait_readable(channel, timeout=None):
+        """Blocks until the channel has data (or EOF) instead of polling recv_ready()."""
+        if channel.recv_ready() or channel.closed:
+            return True
+        try:
+            readable, _, _ = select.select([channel], [], [], timeout)
+        except (OSError, ValueError):
+            # Channel pipe was torn down underneath us
+            return True
+        return bool(readable)
+
+    @staticmethod
+    def _read_available(channel, raw, read_size):
+        """
+        Drains whatever the channel has buffered into raw, doubling the read size while
+        reads come back full and halving it when they come back mostly empty.
+        """
+        while channel.recv_ready():
+            data = channel.recv(read_size)
+            if not data:
+                break
+            raw += data
+            if len(data) == read_size:
+                read_size = min(read_size * 2, MAX_READ_SIZE)
+            elif len(data) < read_size // 4:
+                read_size = max(read_size // 2, MIN_READ_SIZE)
+        return read_size
+
+    @staticmethod
+    def _interrupt_trap(token):
+        """
+        A program killed by Ctrl+C makes bash drop the rest of the line, end marker
+        included, so an INT trap prints the marker with status 130 instead. A program
+        that catches SIGINT and exits on its own never fires it and reports its own status.
+        """
+        action = f"printf '%s_%s_%d:%s\\n' {MARKER}_END {token} 130 \"$PWD\"; unset __easyssh_s; trap - INT"
+        return f"trap {shlex.quote(action)} INT"
+
+    def wrap_command(self, command, token):
+        """
+        Surrounds a command with start/end markers. The end marker carries $? and the
+        shell's $PWD afterwards, so cd, cd -, cd .. and symlinks are tracked exactly.
+        """
+        return (f"printf '%s_%s\\n' {MARKER} {token}; {self._interrupt_trap(token)}; {{ {command}\n}}; "
+                f"printf '%s_%s_%d:%s\\n' {MARKER}_END {token} $? \"$PWD\"; trap - INT\n")
+
+    def wrap_batch(self, steps, token):
+        """
+        Builds one script that runs each step only while every earlier step succeeded,
+        bracketing each with STEP markers (index, then index and $?). The whole script is
+        a single { } group, so the shell reads it in one go and it costs one round trip.
+        """
+        lines = [f"printf '%s_%s\\n' {MARKER} {token}; {self._interrupt_trap(token)}; {{ __easyssh_s=0"]
+        for index, (_, command) in enumerate(steps):
+            lines.append(f"if [ $__easyssh_s -eq 0 ]; then printf '%s_%s_%d\\n' {MARKER}_STEP {token} {index}; {{ {command}\n}}; "
+                         f"__easyssh_s=$?; printf '%s_%s_%d_%d\\n' {MARKER}_STEP {token} {index} $__easyssh_s; fi")
+        # Unset in the same line as the marker, before the shell reads the next script,
+        # so the helper variable never lingers in the user's shell
+        lines.append(f"printf '%s_%s_%d:%s\\n' {MARKER}_END {token} $__easyssh_s \"$PWD\"; "
+                     f"unset __easyssh_s; trap - INT\n}}\n")
+        return "\n".join(lines)
+
+    def stream_command(self, command, metrics=None):
+        """
+        Yields the output of a shell command, without echo or prompt, and returns
+        its exit status once the per-invocation end marker is seen. A CommandMetrics
+        passed as metrics gets the send time, first byte and byte counts.
+        """
+        token = uuid.uuid4().hex[:12]
+        return (yield from self._stream_shell(self.wrap_command(command, token), token, metrics=metrics))
+
+    def stream_batch(self, steps, metrics=None):
+        """
+        Runs several steps as one pipelined script on the interactive shell, stopping at
+        the first failure. Steps are commands or (label, command) pairs; labels are what
+        the status lines show, so secrets in a command stay out of the console. Yields
+        output plus a status line per step, records [(label, status)] in batch_results
+        and returns the last status.
+        """
+        steps = [step if isinstance(step, tuple) else (step, step) for step in steps]
+        token = uuid.uuid4().hex[:12]
+        self.batch_results = []
+
+        def describe(index, status):
+            label = steps[index][0]
+            prefix = f"==> [{index + 1}/{len(steps)}]"
+            if status is None:
+                return f"{prefix} {label}\n"
+            self.batch_results.append((label, status))
+            if status != 0:
+                return f"{prefix} failed with exit code {status}; remaining steps skipped\n"
+            return ""
+
+        return (yield from self._stream_shell(self.wrap_batch(steps, token), token, describe, metrics))
+
+    def _stream_shell(self, script, token, on_step=None, metrics=None):
+        """Sends a marker-wrapped script to the shell and streams its output until the end marker."""
+        # Held for the whole stream, so a reconnect's session restore never interleaves with a command
+        with self._shell_lock:
+            if not self.channel: return
+            return (yield from self._stream_channel(self.channel, script, token, on_step, metrics))
 
+    def _stream_channel(self, channel, script, token, on_step=None, metrics=None):
+        """
+        Body of _stream_shell on the channel bound when the stream began. A reconnect swaps
+        self.channel underneath; this stream ends when its own channel closes.
+        """
         # 1. Clear buffer
-        while self.channel.recv_ready():
-            self.channel.recv(4096)
+        while channel.recv_ready():
+            channel.recv(4096)
 
-        self.channel.send(command + "\n")
-        echo_stripped = False
+        start_marker = f"{MARKER}_{token}"
+        # END_<token>_<status>:<pwd> finishes the stream; STEP_<token>_<index>[_<status>] brackets batch steps
+        marker_pattern = re.compile(re.escape(MARKER) + r"_(END|STEP)_" + token +
+                                    r"_(\d+)(?::([^\r\n]*)|_(\d+))?\r?\n")
+        marker_prefix = f"{MARKER}_"
+        self.last_exit_status = None
+        meter = self.scheduler.shared_meter("shell", INTERACTIVE)
+        self.scheduler.note_interactive()
+        channel.send(script)
+        if metrics:
+            metrics.mark_sent()
+
+        pending = ""
+        started = False
+        # Multi-byte characters split across reads are completed by the incremental decoder
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        raw = bytearray()
+        read_size = MIN_READ_SIZE
 
         while True:
-            if self.channel.recv_ready():
-                chunk = self.channel.recv(4096).decode('utf-8', errors='replace')
-
-                # Strip Echo (First line)
-                if not echo_stripped:
-                    lines = chunk.splitlines(keepends=True)
-                    if lines and command.strip() in lines[0]:
-                        chunk = "".join(lines[1:])
-                    echo_stripped = True
-
-                # Strip Prompt and Break
-                temp_chunk = chunk.rstrip()
-                if temp_chunk.endswith(("$", "#", ">")):
-                    last_nl = chunk.rfind('\n')
-                    if command.startswith("cd"):
-                        if chunk == "":
-                            yield "Changed directory successfully"
-                        else:
-                            yield
-                    if last_nl != -1:
-                        # Yield everything up to the prompt line, then stop
-                        yield chunk[:last_nl].rstrip()
-                        break
-                    else:
-                        # The whole chunk is likely just the prompt
+            self._wait_readable(channel)
+
+            read_size = self._read_available(channel, raw, read_size)
+            if raw:
+                self.scheduler.record(meter, len(raw))
+                if metrics:
+                    metrics.add_chunk(len(raw))
+                pending += decoder.decode(raw)
+                raw.clear()
+
+                # Drop echo, continuation prompts and anything else before the start marker
+                if not started:
+                    idx = pending.find(start_marker)
+                    if idx == -1 or "\n" not in pending[idx:]:
+                        continue
+                    pending = pending[pending.index("\n", idx) + 1:]
+                    started = True
+                    # Output starts here; everything before was the echo of the script
+                    if metrics:
+                        metrics.mark_first_byte()
+
+                # Consume every complete marker; batch output can carry several per read
+                while True:
+                    match = marker_pattern.search(pending)
+                    if not match:
                         break
+                    before = pending[:match.start()]
+                    if match.group(1) == "END":
+                        output = before.rstrip("\r\n")
+                        if output:
+                            yield output
+                        self.last_exit_status = int(match.group(2))
+                        if match.group(3):
+                            self.cwd = match.group(3)
+                        return self.last_exit_status
+                    if before:
+                        yield before
+                    if on_step:
+                        status = match.group(4)
+                        text = on_step(int(match.group(2)), int(status) if status is not None else None)
+                        if text:
+                            yield text
+                    pending = pending[match.end():]
 
-                yield chunk
+                # Hold back trailing newlines and anything that could be the start of a marker
+                safe = len(pending.rstrip("\r\n"))
+                idx = pending.rfind(marker_prefix, 0, safe)
+                if idx != -1 and "\n" not in pending[idx:safe]:
+                    safe = idx
+                else:
+                    for k in range(min(len(marker_prefix), safe), 0, -1):
+                        if pending.endswith(marker_prefix[:k], 0, safe):
+                            safe -= k
+                            break
 
-            if self.channel.exit_status_ready():
-                break
-            time.sleep(0.01)
+                if safe > 0:
+                    yield pending[:safe]
+                    pending = pending[safe:]
+
+            if channel.exit_status_ready() or channel.closed:
+                return None
+
+    def stream_exec(self, command, metrics=None):
+        """
+        Runs a command on a fresh exec channel multiplexed over the shared transport,
+        so it can run alongside whatever is streaming on the interactive shell.
+        Yields output as it arrives and returns the exit status.
+        """
+        if not self.is_active(): return
+
+        channel = self.transport.open_session()
+        self.exec_channels.add(channel)
+        meter = self.scheduler.open_meter(f"exec: {command[:40]}", BACKGROUND)
+        try:
+            channel.set_combine_stderr(True)
+            channel.exec_command(command)
+            if metrics:
+                metrics.mark_sent()
+
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            raw = bytearray()
+            read_size = MIN_READ_SIZE
+
+            # recv() blocks until data arrives and returns b"" at EOF
+            for data in iter(lambda: channel.recv(read_size), b""):
+                raw += data
+                read_size = self._read_available(channel, raw, read_size)
+                self.scheduler.record(meter, len(raw))
+                if metrics:
+                    metrics.mark_first_byte()
+                    metrics.add_chunk(len(raw))
+                text = decoder.decode(raw)
+                raw.clear()
+                if text:
+                    yield text
+
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return channel.recv_exit_status()
+        finally:
+            self.scheduler.close_meter(meter)
+            self.exec_channels.discard(channel)
+            channel.close()
+
+    def download(self, remote_path, local_dir, on_progress=None):
+        """
+        Copies a remote file into local_dir over SCP as a bulk channel: reads are paced
+        by the scheduler and the channel window is kept small, so the transfer cannot
+        queue seconds of data in front of shell output. on_progress(sent, size, rate)
+        is called after every read.
+        """
+        meter = self.scheduler.open_meter(f"scp: {posixpath.basename(remote_path)}", BULK)
+        received = [0]
+
+        def progress(_filename, size, sent):
+            self.scheduler.record(meter, sent - received[0])
+            received[0] = sent
+            if on_progress:
+                on_progress(sent, size, meter.rate())
+
+        window = self.scheduler.bulk_window()
+        channel = (self.transport.open_session(window_size=window, max_packet_size=min(window, 32768))
+                   if window else self.transport.open_session())
+        self.exec_channels.add(channel)
+        try:
+            with SCPClient(self.transport, progress=progress) as scp:
+                # SCPClient reuses an open channel, which lets us pick its window
+                scp.channel = channel
+                scp.get(remote_path, local_dir)
+            return os.path.join(local_dir, posixpath.basename(remote_path))
+        finally:
+            self.scheduler.close_meter(meter)
+            self.exec_channels.discard(channel)
+            channel.close()
+
+    def run_capture(self, command, timeout=None, on_stdout=None, on_stderr=None, stdin=None, metrics=None):
+        """
+        Runs a command on a fresh exec channel, away from the interactive shell, and
+        returns a CaptureResult with stdout and stderr kept apart. stdin (str or
+        bytes) is written to the command and then closed; the command always sees
+        EOF on stdin. on_stdout/on_stderr get each chunk as it arrives instead of it
+        being kept in the result, so long outputs are never held whole. After
+        timeout seconds the channel is closed and the result is marked timed_out.
+        """
+        if not self.is_active():
+            raise ConnectionError("Not connected")
+
+        start = time.perf_counter()
+        deadline = start + timeout if timeout else None
+        channel = self.transport.open_session(timeout=timeout)
+        self.exec_channels.add(channel)
+        meter = self.scheduler.open_meter(f"exec: {command[:40]}", BACKGROUND)
+        stdout, stderr = bytearray(), bytearray()
+        timed_out = False
+        try:
+            channel.exec_command(command)
+            if metrics:
+                metrics.mark_sent()
+            if stdin is not None:
+                channel.sendall(stdin.encode("utf-8") if isinstance(stdin, str) else stdin)
+            channel.shutdown_write()
+
+            readers = ((channel.recv_ready, channel.recv, stdout, on_stdout),
+                       (channel.recv_stderr_ready, channel.recv_stderr, stderr, on_stderr))
+            while True:
+                for ready, recv, buffer, callback in readers:
+                    while ready():
+                        data = recv(MAX_READ_SIZE)
+                        if not data:
+                            break
+                        self.scheduler.record(meter, len(data))
+                        if metrics:
+                            metrics.mark_first_byte()
+                            metrics.add_chunk(len(data))
+                        if callback:
+                            callback(data)
+                        else:
+                            buffer += data
+
+                # Data is delivered before the exit status, so both buffers are complete here
+                if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                    break
+                if channel.closed and not channel.recv_ready() and not channel.recv_stderr_ready():
+                    break
+                remaining = deadline - time.perf_counter() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    timed_out = True
+                    break
+                if channel.eof_received:
+                    # Both streams are drained and at EOF; the poll pipe stays readable from here
+                    # on, so selecting would spin until the exit status arrives
+                    channel.status_event.wait(remaining)
+                else:
+                    # The channel's poll pipe fires for stdout and stderr; the cap catches the exit status
+                    select.select([channel], [], [], min(remaining, 1.0) if remaining is not None else 1.0)
+
+            status = channel.recv_exit_status() if channel.exit_status_ready() else None
+            return CaptureResult(command, bytes(stdout), bytes(stderr), status,
+                                 (time.perf_counter() - start) * 1000, timed_out)
+        finally:
+            self.scheduler.close_meter(meter)
+            self.exec_channels.discard(channel)
+            channel.close()
+
+    def _get_sftp(self):
+        if self._sftp is None or self._sftp.get_channel().closed:
+            try:
+                self._sftp = paramiko.SFTPClient.from_transport(self.transport)
+            except paramiko.SSHException:
+                # The server has no SFTP subsystem; callers fall back to exec commands
+                self.sftp_unavailable = True
+                raise
+        return self._sftp
+
+    def list_dir(self, path, metrics=None):
+        """
+        Lists one remote directory over SFTP and returns (entries, cached), folders
+        first. Symlinks are resolved so linked folders can be browsed. A listing is
+        reused while the directory's mtime is unchanged, so revisiting it costs a
+        single stat instead of a full listdir. A CommandMetrics passed as metrics
+        gets the request time, the stat's reply as first byte and one chunk per entry.
+        """
+        if not self.is_active():
+            raise ConnectionError("Not connected")
+
+        with self._sftp_lock:
+            sftp = self._get_sftp()
+            if metrics:
+                metrics.mark_sent()
+            mtime = sftp.stat(path).st_mtime
+            if metrics:
+                metrics.mark_first_byte()
+            entries = self.listings.get(path, mtime)
+            if entries is not None:
+                return entries, True
+
+            entries = []
+            attrs = sftp.listdir_attr(path)
+            if metrics:
+                # Names only; SFTP doesn't expose the size of the reply packets
+                for attr in attrs:
+                    metrics.add_chunk(len(attr.filename.encode("utf-8", errors="replace")))
+            for attr in attrs:
+                rel_path = posixpath.relpath(posixpath.join(path, attr.filename), self.home) if self.home else None
+                if is_excluded(attr.filename, self.tree_excludes, rel_path):
+                    continue
+                mode = attr.st_mode or 0
+                if stat.S_ISLNK(mode):
+                    try:
+                        mode = sftp.stat(posixpath.join(path, attr.filename)).st_mode or 0
+                    except IOError:
+                        # Dangling link; shown as a plain file
+                        pass
+                entries.append(RemoteEntry(attr.filename, stat.S_ISDIR(mode), attr.st_size or 0, attr.st_mtime or 0))
+            entries.sort(key=RemoteEntry.sort_key)
+            self.listings.put(path, mtime, entries)
+            return entries, False
+
+    def stream_tail(self, path, interval=0.5, backlog=64 * 1024):
+        """
+        Follows a remote file over its own exec channel, yielding new text as it is
+        appended. The byte offset and inode are kept in tail_state, so calling this
+        again after a reconnect resumes where the last stream stopped.
+        """
+        if not self.is_active(): return
+
+        state = self.tail_state.setdefault(path, {"inode": None, "offset": 0})
+        script = TAIL_SCRIPT.format(path=shlex.quote(path), inode=state["inode"] or "''",
+                                    offset=state["offset"], marker=MARKER, interval=interval, backlog=int(backlog))
+
+        channel = self.transport.open_session()
+        self.exec_channels.add(channel)
+        self.tail_channels[path] = channel
+        meter = self.scheduler.open_meter(f"tail: {path}", BACKGROUND)
+        try:
+            channel.exec_command(f"sh -c {shlex.quote(script)}")
+
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            raw = bytearray()
+            read_size = MIN_READ_SIZE
+            frame_len = None
+
+            for data in iter(lambda: channel.recv(read_size), b""):
+                buffered = len(raw)
+                raw += data
+                read_size = self._read_available(channel, raw, read_size)
+                self.scheduler.record(meter, len(raw) - buffered)
+
+                while True:
+                    if frame_len is None:
+                        end = raw.find(b"\n")
+                        if end == -1:
+                            break
+                        _, inode, offset, frame_len = raw[:end].decode().split()
+                        offset, frame_len = int(offset), int(frame_len)
+                        del raw[:end + 1]
+
+                        if offset == 0 and state["offset"] > 0:
+                            rotated = inode != state["inode"]
+                            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                            yield f"\n[{path} was {'rotated' if rotated else 'truncated'}, following from the start]\n"
+                        state["inode"] = inode
+                        state["offset"] = offset
+
+                    if len(raw) < frame_len:
+                        break
+                    text = decoder.decode(bytes(raw[:frame_len]).rstrip(b"\0"))
+                    del raw[:frame_len]
+                    state["offset"] += frame_len
+                    frame_len = None
+                    if text:
+                        yield text
+            return channel.recv_exit_status() if channel.exit_status_ready() else None
+        finally:
+            self.scheduler.close_meter(meter)
+            if self.tail_channels.get(path) is channel:
+                del self.tail_channels[path]
+            self.exec_channels.discard(channel)
+            channel.close()
+
+    def stop_tail(self, path, forget=False):
+        """Closes the channel following path; forget=True also drops the saved offset."""
+        channel = self.tail_channels.pop(path, None)
+        if channel:
+            channel.close()
+        if forget:
+            self.tail_state.pop(path, None)
 
     def get_pwd_silently(self):
         """Fetches directory using a separate exec session to stay truly silent."""
-        if not self.client:
+        if not self.is_active():
             return ""
 
         try:
-            # exec_command creates a brand new, temporary channel
-            stdin, stdout, stderr = self.client.exec_command("pwd")
-
-            # Read the output and strip newlines
-            path = stdout.read().decode('utf-8').strip()
+            path = self.run_capture("pwd", timeout=5).text.strip()
 
             if path.startswith('/'):
                 return path
@@ -112,33 +797,327 @@ class SSHManager:
 
     def send_interrupt(self):
         if self.channel and not self.channel.closed:
+            self.scheduler.note_interactive()
             self.channel.send('\x03')
+            # Nothing else is typed: the program may catch SIGINT and keep the tty for a
+            # while. The wrapper's INT trap or its own end marker finishes the stream.
 
     def close(self):
-        if self.channel: self.channel.close()
-        if self.client: self.client.close()
+        # Its channel goes down with the transport; the next list_dir opens a new one
+        self._sftp = None
+        for channel in list(self.exec_channels) + [self.channel]:
+            if channel is None:
+                continue
+            try:
+                channel.close()
+            except (EOFError, OSError, paramiko.SSHException):
+                # Link is already gone; the transport close below cleans up
+                pass
+        if self.transport: self.transport.close()
+        if self._bastion:
+            BASTIONS.release(*self._bastion)
+            self._bastion = None
 
 
 class SSHStreamWorker(QThread):
     # Signal to send new text to the UI
     output_received = pyqtSignal(str)
+    # Error text when the stream broke off (link dropped, spool closed); finished still follows
+    failed = pyqtSignal(str)
     finished = pyqtSignal()
+    # Internal: hop from the reader thread to the UI thread
+    _flush_requested = pyqtSignal()
+    _flush_scheduled = pyqtSignal()
 
-    def __init__(self, manager, command):
+    def __init__(self, manager, command, use_shell=True, spool=None, steps=None, kind=None):
         super().__init__()
         self.manager = manager
         self.command = command
+        # When set, runs these steps through stream_batch instead of command
+        self.steps = steps
+        # Background jobs get their own exec channel instead of the interactive shell
+        self.use_shell = use_shell
+        # Optional OutputSpool that receives every byte before any UI coalescing
+        self.spool = spool
+        self.exit_code = None
         self._is_running = True
+        # Timeline of this command, recorded in METRICS once the last output reaches the UI
+        default_kind = "batch" if steps else "interactive" if use_shell else "exec"
+        self.metrics = CommandMetrics(command, kind or default_kind)
+        self._metrics_recorded = False
+
+        # Output is buffered here by the reader thread and drained on the UI thread
+        self._buffer = []
+        self._buffered_size = 0
+        self._buffer_lock = threading.Lock()
+        self._stream_done = False
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush)
+        self._flush_requested.connect(self._flush)
+        self._flush_scheduled.connect(self._arm_flush_timer)
 
     def run(self):
-        for chunk in self.manager.stream_command(self.command):
-            if not self._is_running:
-                break
-            if chunk:
-                print(chunk)
-                self.output_received.emit(chunk)
+        self.metrics.mark_started()
+        stream = None
+        try:
+            if self.steps:
+                stream = self.manager.stream_batch(self.steps, self.metrics)
+            elif self.use_shell:
+                stream = self.manager.stream_command(self.command, self.metrics)
+            else:
+                stream = self.manager.stream_exec(self.command, self.metrics)
+            while self._is_running:
+                try:
+                    chunk = next(stream)
+                except StopIteration as done:
+                    self.exit_code = done.value
+                    break
+                if chunk:
+                    if self.spool:
+                        self.spool.append(chunk)
+                    self._buffer_output(chunk)
+            else:
+                stream.close()
+        except Exception as e:
+            # A dropped link ("Socket is closed") or a closed spool; the job still has to
+            # finish, or its queue lane stays blocked and nothing typed afterwards runs
+            if stream is not None:
+                stream.close()
+            self.failed.emit(str(e) or type(e).__name__)
+        finally:
+            if self.spool:
+                try:
+                    self.spool.finish()
+                except (OSError, ValueError):
+                    pass
+            self.metrics.mark_finished(self.exit_code)
 
-        self.finished.emit()
+            # Queued, so the last flush is delivered before finished
+            self._stream_done = True
+            self._flush_requested.emit()
+            self.finished.emit()
 
     def stop(self):
         self._is_running = False
+
+    def _buffer_output(self, chunk):
+        with self._buffer_lock:
+            first = not self._buffer
+            self._buffer.append(chunk)
+            self._buffered_size += len(chunk)
+            full = self._buffered_size >= FLUSH_BYTES
+
+        if full:
+            self._flush_requested.emit()
+        elif first:
+            self._flush_scheduled.emit()
+
+    def _arm_flush_timer(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        with self._buffer_lock:
+            text = "".join(self._buffer)
+            # A trailing \r may be the first half of a CRLF split across reads
+            if text.endswith("\r") and not self._stream_done:
+                self._buffer = ["\r"]
+                self._buffered_size = 1
+                text = text[:-1]
+            else:
+                self._buffer = []
+                self._buffered_size = 0
+
+        text = collapse_progress_frames(text)
+        if text:
+            if self.metrics:
+                self.metrics.mark_ui()
+            self.output_received.emit(text)
+        if self._stream_done and self.metrics and not self._metrics_recorded:
+            self._metrics_recorded = True
+            METRICS.record(self.metrics)
+
+
+class SSHCaptureWorker(QThread):
+    """
+    Runs SSHManager.run_capture off the UI thread and hands back the CaptureResult.
+    With stream_stdout, stdout is emitted through stdout_received as it arrives
+    and the result's stdout stays empty.
+    """
+    stdout_received = pyqtSignal(str)
+    completed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, manager, command, stdin=None, timeout=CAPTURE_TIMEOUT, kind="exec", stream_stdout=False):
+        super().__init__()
+        self.manager = manager
+        self.command = command
+        self.stdin = stdin
+        self.timeout = timeout
+        self.stream_stdout = stream_stdout
+        self.metrics = CommandMetrics(command, kind)
+
+    def run(self):
+        self.metrics.mark_started()
+        on_stdout = None
+        if self.stream_stdout:
+            # Chunks can split a multi-byte character
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+            def on_stdout(data):
+                text = decoder.decode(data)
+                if text:
+                    self.metrics.mark_ui()
+                    self.stdout_received.emit(text)
+        try:
+            result = self.manager.run_capture(self.command, self.timeout, stdin=self.stdin,
+                                              on_stdout=on_stdout, metrics=self.metrics)
+        except Exception as e:
+            self.metrics.mark_finished(None)
+            METRICS.record(self.metrics)
+            self.failed.emit(str(e) or type(e).__name__)
+        else:
+            self.metrics.mark_finished(result.exit_status)
+            self.metrics.mark_ui()
+            METRICS.record(self.metrics)
+            self.completed.emit(result)
+        finally:
+            # Frees the job's queue lane whatever happened above
+            self.finished.emit()
+
+
+class SSHListDirWorker(QThread):
+    """Runs SSHManager.list_dir off the UI thread; both signals carry the listed path first."""
+    completed = pyqtSignal(str, object, bool)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, manager, path):
+        super().__init__()
+        self.manager = manager
+        self.path = path
+        # Listings are how the tree loads now, so they count as tree scans in the diagnostics
+        self.metrics = CommandMetrics(f"sftp ls {path}", "tree scan")
+
+    def run(self):
+        self.metrics.mark_started()
+        try:
+            entries, cached = self.manager.list_dir(self.path, self.metrics)
+        except Exception as e:
+            self.metrics.mark_finished(None)
+            METRICS.record(self.metrics)
+            self.failed.emit(self.path, str(e) or type(e).__name__)
+        else:
+            self.metrics.mark_finished(0)
+            self.metrics.mark_ui()
+            METRICS.record(self.metrics)
+            self.completed.emit(self.path, entries, cached)
+
+
+class SSHTailWorker(SSHStreamWorker):
+    """Follows a remote log file until stopped, resuming from the saved offset after reconnects."""
+
+    def __init__(self, manager, path, interval=0.5):
+        super().__init__(manager, f"tail {path}", use_shell=False)
+        self.path = path
+        self.interval = interval
+        # Open-ended, so there is no completion time to record
+        self.metrics = None
+
+    def run(self):
+        while self._is_running:
+            if self.manager.is_active():
+                try:
+                    for chunk in self.manager.stream_tail(self.path, self.interval):
+                        if chunk:
+                            self._buffer_output(chunk)
+                except (EOFError, OSError, paramiko.SSHException):
+                    # Link dropped; the liveness monitor reconnects and we resume below
+                    pass
+            if self._is_running:
+                self.msleep(1000)
+
+        self._stream_done = True
+        self._flush_requested.emit()
+        self.finished.emit()
+
+    def stop(self):
+        super().stop()
+        self.manager.stop_tail(self.path)
+
+
+class SSHLinkProbeWorker(QThread):
+    """Runs SSHManager.measure_link off the UI thread."""
+    result_ready = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+
+    def run(self):
+        try:
+            self.result_ready.emit(self.manager.measure_link())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class SSHTransferWorker(QThread):
+    """Runs SSHManager.download off the UI thread, reporting progress at most every 100 ms."""
+    progress_changed = pyqtSignal(int, int, float)
+    completed = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, manager, remote_path, local_dir):
+        super().__init__()
+        self.manager = manager
+        self.remote_path = remote_path
+        self.local_dir = local_dir
+        self._last_report = 0.0
+
+    def run(self):
+        try:
+            self.completed.emit(self.manager.download(self.remote_path, self.local_dir, self._report))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _report(self, sent, size, rate):
+        now = time.monotonic()
+        if now - self._last_report >= 0.1 or sent >= size:
+            self._last_report = now
+            self.progress_changed.emit(sent, size, rate)
+
+
+class SSHLivenessMonitor(QThread):
+    """Probes the connection in the background and reconnects with exponential backoff."""
+    connection_changed = pyqtSignal(bool)
+    reconnected = pyqtSignal(str)
+
+    def __init__(self, manager, interval=KEEPALIVE_INTERVAL, max_backoff=60):
+        super().__init__()
+        self.manager = manager
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            if self.manager.probe():
+                continue
+
+            self.connection_changed.emit(False)
+            delay = 1
+            while not self._stop_event.is_set():
+                success, msg = self.manager.reconnect()
+                if success:
+                    self.connection_changed.emit(True)
+                    self.reconnected.emit(msg)
+                    break
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+    def stop(self):
+        self._stop_event.set()
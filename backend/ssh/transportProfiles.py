@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import socket
+
+# AEAD ciphers first: with AES-NI they are the cheapest per byte and skip the separate MAC
+FAST_CIPHERS = ("aes128-gcm@openssh.com", "aes256-gcm@openssh.com", "aes128-ctr", "aes256-ctr")
+
+
+def _sysctl(name):
+    """Integers in /proc/sys/net/<name>, or None where it can't be read (off Linux)."""
+    try:
+        with open(f"/proc/sys/net/{name}") as f:
+            return [int(value) for value in f.read().split()]
+    except (OSError, ValueError):
+        return None
+
+
+def _beats_autotuning(requested, cap, autotune):
+    # setsockopt is capped at 2 x cap; autotuning grows the buffer up to the last field of autotune
+    cap, autotune = _sysctl(cap), _sysctl(autotune)
+    if not cap or not autotune:
+        return False
+    return 2 * min(requested, cap[0]) > autotune[-1]
+
+
+def open_socket(host, port, timeout=10, profile=None):
+    """
+    TCP connection to host:port with Nagle off and the profile's buffers applied before
+    connecting. Returns (sock, fixed), fixed holding the buffer options set by hand.
+    """
+    error = OSError(f"Could not resolve {host}")
+    for family, kind, proto, _, address in socket.getaddrinfo(host, int(port), type=socket.SOCK_STREAM):
+        sock = socket.socket(family, kind, proto)
+        try:
+            fixed = profile.apply_socket(sock) if profile else set()
+            sock.settimeout(timeout)
+            sock.connect(address)
+        except OSError as e:
+            sock.close()
+            error = e
+            continue
+        # Shell traffic is many tiny writes; Nagle would hold each one back for a delayed ACK
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, fixed
+    raise error
+
+
+def describe_buffers(sock, fixed):
+    """Receive/send buffers as the kernel reports them, for connect and probe messages."""
+    parts = []
+    for name, option in (("rcvbuf", socket.SO_RCVBUF), ("sndbuf", socket.SO_SNDBUF)):
+        size = sock.getsockopt(socket.SOL_SOCKET, option) // 1024
+        # An autotuned buffer reports its current size, which grows with the connection
+        parts.append(f"{name} {size} KB {'fixed' if option in fixed else 'autotuned'}")
+    return ", ".join(parts)
+
+
+class TransportProfile:
+    def __init__(self, name, label, window_size, max_packet_size, compress=False,
+                 rekey_bytes=None, socket_buffer=None, ciphers=FAST_CIPHERS):
+        self.name = name
+        self.label = label
+        # Receive window per channel; must cover bandwidth x RTT or the sender stalls every window
+        self.window_size = window_size
+        self.max_packet_size = max_packet_size
+        self.compress = compress
+        # Bytes before paramiko forces a rekey (None keeps its 512 MB default)
+        self.rekey_bytes = rekey_bytes
+        # Kernel socket buffers; used only where they beat autotuning (see apply_socket)
+        self.socket_buffer = socket_buffer
+        self.ciphers = ciphers
+
+    def apply_socket(self, sock):
+        """
+        Must run before connect(): the window scale is fixed in the SYN. A fixed buffer
+        turns off kernel autotuning, so each one is set only when the kernel would grant
+        more than autotuning reaches on its own. Returns the options that were set.
+        """
+        applied = set()
+        if self.socket_buffer:
+            for option, cap, autotune in ((socket.SO_RCVBUF, "core/rmem_max", "ipv4/tcp_rmem"),
+                                          (socket.SO_SNDBUF, "core/wmem_max", "ipv4/tcp_wmem")):
+                if _beats_autotuning(self.socket_buffer, cap, autotune):
+                    sock.setsockopt(socket.SOL_SOCKET, option, self.socket_buffer)
+                    applied.add(option)
+        return applied
+
+    def apply_transport(self, transport):
+        """Must run before start_client(): compression and ciphers are fixed during key exchange."""
+        transport.use_compression(self.compress)
+
+        options = transport.get_security_options()
+        preferred = [cipher for cipher in self.ciphers if cipher in options.ciphers]
+        options.ciphers = tuple(preferred + [cipher for cipher in options.ciphers if cipher not in preferred])
+
+        if self.rekey_bytes:
+            # Only the byte threshold; paramiko's packet threshold (2^29 packets) is left alone
+            transport.packetizer.REKEY_BYTES = self.rekey_bytes
+
+
+PROFILES = {
+    "lan": TransportProfile(
+        "lan", "LAN",
+        window_size=4 * 1024 * 1024, max_packet_size=32768,
+    ),
+    "wan": TransportProfile(
+        "wan", "WAN (high latency)",
+        # 64 MB keeps a 1 Gbit/s link busy at up to ~500 ms RTT
+        window_size=64 * 1024 * 1024, max_packet_size=128 * 1024,
+        rekey_bytes=2 ** 31, socket_buffer=16 * 1024 * 1024,
+    ),
+    "compressed": TransportProfile(
+        "compressed", "Low bandwidth (compressed)",
+        window_size=2 * 1024 * 1024, max_packet_size=32768, compress=True,
+    ),
+}
+
+# Shown in settings; "default" leaves paramiko's own settings untouched
+PROFILE_CHOICES = [("default", "Default")] + [(name, profile.label) for name, profile in PROFILES.items()]
+
+
+def get_profile(name):
+    return PROFILES.get(name or "default")
+
+
+def recommend_profile(rtt_ms, mb_per_s):
+    """Picks a profile from a measured round-trip time and download rate."""
+    # Under ~2 MB/s the link, not the CPU, is the bottleneck, so zlib pays for itself
+    if mb_per_s < 2:
+        return "compressed"
+    if rtt_ms >= 20:
+        return "wan"
+    return "lan"
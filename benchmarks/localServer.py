@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import os
+import posixpath
+import re
+import shlex
+import socket
+import subprocess
+import threading
+import time
+
+import paramiko
+
+# Commands understood by the scripted shell, on both the interactive shell and exec channels:
+#   emit BYTES [CHUNK] [BYTES_PER_SEC]   write BYTES of 80-column lines, CHUNK bytes per write
+#   progress FRAMES [DELAY]              write tqdm-style "\r" progress frames
+#   sleep SECONDS                        interruptible with Ctrl+C
+#   head -c BYTES /dev/urandom|/dev/zero raw bytes, as used by SSHManager.measure_link
+#   echo / printf / pwd / cd / true / false / exit N
+
+# Raised by channel writes once the client has hung up
+CLIENT_GONE = (EOFError, OSError, paramiko.SSHException)
+
+
+def to_pty_bytes(text):
+    # A pty turns \n into \r\n on the way out
+    if isinstance(text, bytes):
+        return text.replace(b"\n", b"\r\n")
+    return text.replace("\n", "\r\n").encode()
+
+
+class ShellInterrupted(Exception):
+    pass
+
+
+class ScriptedShell:
+    """
+    A tiny stand-in for bash: enough of ;, &&, ||, { } groups, if/then/fi, variables,
+    [ -eq ] and printf to run the wrappers SSHManager sends, plus the benchmark commands
+    listed above.
+    """
+
+    def __init__(self, write, home="/home/bench", interrupted=None):
+        self.write = write
+        self.home = home
+        self.cwd = home
+        self.oldpwd = home
+        self.status = 0
+        self.vars = {}
+        self.interrupted = interrupted or threading.Event()
+
+    # ---- parsing ----
+    @staticmethod
+    def tokenize(script):
+        lexer = shlex.shlex(script.replace("\n", " ; "), posix=True, punctuation_chars=";&|")
+        lexer.whitespace_split = True
+        lexer.commenters = ""
+        return list(lexer)
+
+    @staticmethod
+    def is_complete(script):
+        if not script.endswith("\n"):
+            return False
+        try:
+            tokens = ScriptedShell.tokenize(script)
+        except ValueError:
+            # Unterminated quote
+            return False
+        return tokens.count("{") <= tokens.count("}") and tokens.count("if") <= tokens.count("fi")
+
+    def run(self, script):
+        self.interrupted.clear()
+        try:
+            self.status = self._run_list(self.tokenize(script))
+        except ShellInterrupted:
+            self.status = 130
+            raise
+        return self.status
+
+    def _run_list(self, tokens):
+        status = self.status
+        i = 0
+        skip = False
+        while i < len(tokens):
+            end, group = self._next_command(tokens, i)
+            op = tokens[end] if end < len(tokens) else ";"
+            if not skip:
+                if group and group[0] == "{":
+                    status = self._run_group(group)
+                elif group and group[0] == "if":
+                    status = self._run_if(group)
+                else:
+                    status = self._run_simple(group)
+                self.status = status
+            # && and || short-circuit the next command only
+            skip = (op == "&&" and status != 0) or (op == "||" and status == 0)
+            i = end + 1
+        return status
+
+    def _next_command(self, tokens, i):
+        depth = 0
+        j = i
+        while j < len(tokens):
+            token = tokens[j]
+            if token in ("{", "if"):
+                depth += 1
+            elif token in ("}", "fi"):
+                depth -= 1
+            elif depth == 0 and token in (";", "&&", "||"):
+                break
+            j += 1
+        return j, tokens[i:j]
+
+    def _run_group(self, group):
+        return self._run_list(group[1:-1])
+
+    def _run_if(self, group):
+        # if COND ; then BODY ; fi  (no elif/else)
+        depth = 0
+        for i, token in enumerate(group):
+            if token in ("{", "if"):
+                depth += 1
+            elif token in ("}", "fi"):
+                depth -= 1
+            elif token == "then" and depth == 1:
+                break
+        if self._run_list(group[1:i]) == 0:
+            return self._run_list(group[i + 1:-1])
+        return 0
+
+    # ---- commands ----
+    def _expand(self, word):
+        names = {"?": str(self.status), "PWD": self.cwd, "HOME": self.home}
+        word = re.sub(r"\$(\?|[A-Za-z_]\w*)", lambda m: names.get(m.group(1), self.vars.get(m.group(1), "")), word)
+        return word.replace("~", self.home)
+
+    def _run_simple(self, words):
+        if not words:
+            return self.status
+        if len(words) == 1 and re.match(r"[A-Za-z_]\w*=", words[0]):
+            name, value = words[0].split("=", 1)
+            self.vars[name] = self._expand(value)
+            return 0
+        name, *args = [self._expand(word) for word in words]
+        if name == "[":
+            name, args = "test", args[:-1]
+        handler = getattr(self, f"cmd_{name}", None)
+        if handler is None:
+            self.write(f"bench-shell: {name}: command not found\n")
+            return 127
+        return handler(args)
+
+    def _check_interrupt(self):
+        if self.interrupted.is_set():
+            raise ShellInterrupted()
+
+    def cmd_test(self, args):
+        left, op, right = args
+        checks = {"-eq": int.__eq__, "-ne": int.__ne__, "-lt": int.__lt__, "-gt": int.__gt__}
+        return 0 if checks[op](int(left), int(right)) else 1
+
+    def cmd_true(self, args):
+        return 0
+
+    def cmd_false(self, args):
+        return 1
+
+    def cmd_exit(self, args):
+        return int(args[0]) if args else 0
+
+    def cmd_echo(self, args):
+        self.write(" ".join(args) + "\n")
+        return 0
+
+    def cmd_printf(self, args):
+        fmt, values = args[0], list(args[1:])
+        fmt = fmt.replace("\\n", "\n").replace("\\r", "\r").replace("%d", "%s")
+        self.write(fmt % tuple(values[:fmt.count("%s")]))
+        return 0
+
+    def cmd_pwd(self, args):
+        self.write(self.cwd + "\n")
+        return 0
+
+    def cmd_cd(self, args):
+        target = args[0] if args else self.home
+        if target == "-":
+            target = self.oldpwd
+            self.write(target + "\n")
+        self.oldpwd, self.cwd = self.cwd, posixpath.normpath(posixpath.join(self.cwd, target))
+        return 0
+
+    def cmd_sleep(self, args):
+        if self.interrupted.wait(float(args[0])):
+            raise ShellInterrupted()
+        return 0
+
+    def cmd_emit(self, args):
+        total = int(args[0])
+        chunk_size = int(args[1]) if len(args) > 1 else 65536
+        rate = float(args[2]) if len(args) > 2 else 0
+        line = "x" * 79 + "\n"
+        block = (line * (chunk_size // len(line) + 1))[:chunk_size]
+        started = time.monotonic()
+        sent = 0
+        while sent < total:
+            self._check_interrupt()
+            piece = block[:min(chunk_size, total - sent)]
+            self.write(piece)
+            sent += len(piece)
+            if rate:
+                ahead = sent / rate - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        return 0
+
+    def cmd_head(self, args):
+        total = int(args[1])
+        source = os.urandom if args[2] == "/dev/urandom" else bytes
+        sent = 0
+        while sent < total:
+            self._check_interrupt()
+            size = min(65536, total - sent)
+            self.write(source(size))
+            sent += size
+        return 0
+
+    def cmd_progress(self, args):
+        frames = int(args[0])
+        delay = float(args[1]) if len(args) > 1 else 0
+        for i in range(1, frames + 1):
+            self._check_interrupt()
+            pct = 100 * i // frames
+            bar = "█" * (pct // 5) + " " * (20 - pct // 5)
+            self.write(f"\rEpoch 0: {pct:3d}%|{bar}| {i}/{frames} [loss=0.{i % 1000:03d}]")
+            if delay:
+                time.sleep(delay)
+        self.write("\n")
+        return 0
+
+
+class _LocalSFTPInterface(paramiko.SFTPServerInterface):
+    """Read-only SFTP view of the local filesystem, enough for directory listings."""
+
+    def list_folder(self, path):
+        try:
+            return [paramiko.SFTPAttributes.from_stat(os.lstat(os.path.join(path, name)), name)
+                    for name in os.listdir(path)]
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.lstat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class _BenchServerInterface(paramiko.ServerInterface):
+    def __init__(self, server):
+        self.server = server
+        # direct-tcpip channel id -> (host, port), picked up by the forward loop
+        self.forwards = {}
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if username == self.server.username and password == self.server.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_direct_tcpip_request(self, chanid, origin, destination):
+        # Jump-host support, limited to loopback so the bench server cannot be used as a relay
+        if destination[0] not in ("127.0.0.1", "localhost"):
+            return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+        self.forwards[chanid] = destination
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        threading.Thread(target=self.server.serve_shell, args=(channel,), daemon=True).start()
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.server.serve_exec, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+class LocalSSHServer:
+    """
+    In-process SSH server on 127.0.0.1 backed by ScriptedShell, so SSHManager can be
+    exercised and benchmarked without a remote machine:
+
+        with LocalSSHServer() as server:
+            manager = SSHManager("127.0.0.1", server.username, server.port, server.password)
+    """
+
+    def __init__(self, username="bench", password="bench", prompt="bench@localhost:~$ ", motd="Welcome to the bench server\n",
+                 passthrough_exec=False):
+        self.username = username
+        # Run exec requests with the local /bin/sh instead of the scripted shell
+        self.passthrough_exec = passthrough_exec
+        self.password = password
+        self.prompt = prompt
+        self.motd = motd
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.port = None
+        self._sock = None
+        self._transports = []
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(16)
+        self.port = self._sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+
+    def _accept_loop(self):
+        while self._sock:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            # sshd disables Nagle on interactive sessions; match it so latencies are comparable
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            if self.passthrough_exec:
+                # Same trust as passthrough exec: the client already sees the local machine
+                transport.set_subsystem_handler("sftp", paramiko.SFTPServer, _LocalSFTPInterface)
+            self._transports.append(transport)
+            interface = _BenchServerInterface(self)
+            transport.start_server(server=interface)
+            threading.Thread(target=self._forward_loop, args=(transport, interface), daemon=True).start()
+
+    def _forward_loop(self, transport, interface):
+        # Session channels are served from the check callbacks; only tunnels need the accepted channel
+        while transport.is_active():
+            channel = transport.accept(1)
+            if channel is None:
+                continue
+            destination = interface.forwards.pop(channel.get_id(), None)
+            if destination:
+                threading.Thread(target=self.serve_forward, args=(channel, destination), daemon=True).start()
+
+    def serve_forward(self, channel, destination):
+        try:
+            upstream = socket.create_connection(destination)
+        except OSError:
+            channel.close()
+            return
+        upstream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def pump(read, write, half_close):
+            try:
+                for data in iter(lambda: read(65536), b""):
+                    write(data)
+                # Pass EOF on instead of resetting, so the far end shuts down cleanly
+                half_close()
+            except (OSError, ValueError) + CLIENT_GONE:
+                pass
+
+        back = threading.Thread(target=pump, args=(upstream.recv, channel.sendall, channel.shutdown_write), daemon=True)
+        back.start()
+        pump(channel.recv, upstream.sendall, lambda: upstream.shutdown(socket.SHUT_WR))
+        back.join()
+        upstream.close()
+        try:
+            channel.close()
+        except CLIENT_GONE:
+            pass
+
+    def serve_shell(self, channel):
+        interrupted = threading.Event()
+        shell = ScriptedShell(lambda text: channel.sendall(to_pty_bytes(text)), interrupted=interrupted)
+        pending = ""
+        ready = threading.Condition()
+        closed = False
+
+        def reader():
+            nonlocal pending, closed
+            try:
+                while True:
+                    data = channel.recv(65536)
+                    if not data:
+                        break
+                    text = data.decode(errors="replace")
+                    if "\x03" in text:
+                        interrupted.set()
+                        text = text.replace("\x03", "")
+                    # Echo typed input back, like a terminal would
+                    channel.sendall(text.replace("\n", "\r\n").encode())
+                    with ready:
+                        pending += text
+                        ready.notify()
+            except CLIENT_GONE:
+                pass
+            with ready:
+                closed = True
+                ready.notify()
+
+        threading.Thread(target=reader, daemon=True).start()
+        try:
+            channel.sendall((self.motd.replace("\n", "\r\n") + self.prompt).encode())
+
+            while True:
+                with ready:
+                    while not closed and not ScriptedShell.is_complete(pending):
+                        ready.wait()
+                    if closed:
+                        break
+                    script, pending = pending, ""
+                try:
+                    shell.run(script)
+                except ShellInterrupted:
+                    # Like bash, Ctrl+C abandons the rest of the command list
+                    channel.sendall(b"^C\r\n")
+                channel.sendall(self.prompt.encode())
+            channel.close()
+        except CLIENT_GONE:
+            pass
+
+    def serve_exec(self, channel, command):
+        # The exec reply is sent by the transport thread once the check returns; closing
+        # before it goes out makes the client's exec_command fail with "Channel closed"
+        time.sleep(0.002)
+        if self.passthrough_exec:
+            self._serve_local_exec(channel, command)
+            return
+        shell = ScriptedShell(lambda text: channel.sendall(text if isinstance(text, bytes) else text.encode()))
+        try:
+            try:
+                status = shell.run(command + "\n")
+            except ShellInterrupted:
+                status = 130
+            channel.send_exit_status(status)
+            channel.close()
+        except CLIENT_GONE:
+            pass
+
+    def _serve_local_exec(self, channel, command):
+        process = subprocess.Popen(["/bin/sh", "-c", command], stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        def pump_stdin():
+            # Protocols like scp talk back over stdin
+            try:
+                for data in iter(lambda: channel.recv(65536), b""):
+                    process.stdin.write(data)
+                    process.stdin.flush()
+            except (OSError, ValueError) + CLIENT_GONE:
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        def pump_stderr():
+            # Kept on the extended data stream, like sshd does
+            try:
+                for data in iter(lambda: process.stderr.read1(65536), b""):
+                    channel.sendall_stderr(data)
+            except CLIENT_GONE:
+                pass
+
+        threading.Thread(target=pump_stdin, daemon=True).start()
+        stderr_thread = threading.Thread(target=pump_stderr, daemon=True)
+        stderr_thread.start()
+        try:
+            for data in iter(lambda: process.stdout.read1(65536), b""):
+                channel.sendall(data)
+            stderr_thread.join()
+            channel.send_exit_status(process.wait())
+            channel.close()
+        except CLIENT_GONE:
+            # Client closed the channel; stop the command with it
+            process.kill()
+            process.wait()
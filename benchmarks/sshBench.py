@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+# Runs SSHManager against the in-process LocalSSHServer, so no network or remote host is needed:
+#   python -m benchmarks.sshBench [--runs N] [--megabytes MB] [--profile lan|wan|compressed] [--json]
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ssh.sshManager import SSHManager
+from backend.ssh.transportProfiles import PROFILES
+from benchmarks.localServer import LocalSSHServer
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples_ms):
+    return {"median_ms": statistics.median(samples_ms), "p90_ms": percentile(samples_ms, 90)}
+
+
+def bench_connect(server, runs, profile):
+    totals = []
+    phases = {}
+    for _ in range(runs):
+        manager = SSHManager("127.0.0.1", server.username, server.port, server.password, profile=profile)
+        start = time.perf_counter()
+        success, msg = manager.connect()
+        totals.append((time.perf_counter() - start) * 1000)
+        if not success:
+            raise RuntimeError(f"connect failed: {msg}")
+        for name, ms in manager.connect_timings.items():
+            phases.setdefault(name, []).append(ms)
+        manager.close()
+    result = summarize(totals)
+    result["phases_ms"] = {name: statistics.median(values) for name, values in phases.items()}
+    return result
+
+
+def bench_jump(server, runs, profile):
+    """Connects through a second local server acting as bastion: the first hop dials it, later ones reuse it."""
+    with LocalSSHServer() as bastion:
+        jump = f"{bastion.username}@127.0.0.1:{bastion.port}"
+        cold, warm = [], []
+        for _ in range(runs):
+            managers = []
+            for samples in (cold, warm):
+                manager = SSHManager("127.0.0.1", server.username, server.port, server.password,
+                                     profile=profile, jump_host=jump, jump_password=bastion.password)
+                start = time.perf_counter()
+                success, msg = manager.connect()
+                samples.append((time.perf_counter() - start) * 1000)
+                if not success:
+                    raise RuntimeError(f"jump connect failed: {msg}")
+                managers.append(manager)
+            for manager in managers:
+                manager.close()
+    return {"cold": summarize(cold), "warm": summarize(warm)}
+
+
+def bench_throughput(manager, stream, megabytes):
+    total = int(megabytes * 1024 * 1024)
+    start = time.perf_counter()
+    received = 0
+    for chunk in stream(f"emit {total}"):
+        received += len(chunk)
+    elapsed = time.perf_counter() - start
+    return {"mb_per_s": received / elapsed / (1024 * 1024), "received_mb": received / (1024 * 1024)}
+
+
+def bench_ttfb(manager, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in manager.stream_command("echo ready"):
+            samples.append((time.perf_counter() - start) * 1000)
+            break
+    # Let the abandoned streams' end markers arrive before the next benchmark drains them
+    for _ in manager.stream_command("true"):
+        pass
+    return summarize(samples)
+
+
+def bench_progress(manager, frames):
+    start = time.perf_counter()
+    chunks = sum(1 for _ in manager.stream_command(f"progress {frames}"))
+    return {"frames": frames, "chunks": chunks, "elapsed_ms": (time.perf_counter() - start) * 1000}
+
+
+def bench_interrupt(manager, runs):
+    samples = []
+    statuses = []
+    for _ in range(runs):
+        done = threading.Event()
+        result = {}
+
+        def consume():
+            stream = manager.stream_command("sleep 30")
+            try:
+                while True:
+                    next(stream)
+            except StopIteration as finished:
+                result["status"] = finished.value
+            done.set()
+
+        thread = threading.Thread(target=consume, daemon=True)
+        thread.start()
+        time.sleep(0.2)
+        start = time.perf_counter()
+        manager.send_interrupt()
+        if not done.wait(10):
+            raise RuntimeError("interrupted command never finished")
+        samples.append((time.perf_counter() - start) * 1000)
+        statuses.append(result.get("status"))
+        thread.join()
+    summary = summarize(samples)
+    summary["exit_statuses"] = sorted(set(statuses), key=str)
+    return summary
+
+
+def bench_pwd(manager, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        manager.get_pwd_silently()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def run_all(args):
+    results = {}
+    with LocalSSHServer() as server:
+        results["connect"] = bench_connect(server, args.runs, args.profile)
+        results["jump_connect"] = bench_jump(server, args.runs, args.profile)
+
+        manager = SSHManager("127.0.0.1", server.username, server.port, server.password, profile=args.profile)
+        success, msg = manager.connect()
+        if not success:
+            raise RuntimeError(f"connect failed: {msg}")
+        try:
+            results["shell_throughput"] = bench_throughput(manager, manager.stream_command, args.megabytes)
+            results["exec_throughput"] = bench_throughput(manager, manager.stream_exec, args.megabytes)
+            results["ttfb"] = bench_ttfb(manager, args.runs * 4)
+            results["progress"] = bench_progress(manager, args.frames)
+            results["interrupt"] = bench_interrupt(manager, args.runs)
+            results["pwd_roundtrip"] = bench_pwd(manager, args.runs * 4)
+            results["link_probe"] = manager.measure_link()
+        finally:
+            manager.close()
+    return results
+
+
+def print_table(results):
+    connect = results["connect"]
+    phases = ", ".join(f"{name} {ms:.1f}" for name, ms in connect["phases_ms"].items())
+    rows = [
+        ("connect", f"median {connect['median_ms']:.1f} ms, p90 {connect['p90_ms']:.1f} ms ({phases})"),
+        ("jump connect", f"first hop {results['jump_connect']['cold']['median_ms']:.1f} ms, "
+                         f"shared bastion {results['jump_connect']['warm']['median_ms']:.1f} ms"),
+        ("shell throughput", f"{results['shell_throughput']['mb_per_s']:.1f} MB/s"),
+        ("exec throughput", f"{results['exec_throughput']['mb_per_s']:.1f} MB/s"),
+        ("first byte", f"median {results['ttfb']['median_ms']:.2f} ms, p90 {results['ttfb']['p90_ms']:.2f} ms"),
+        ("progress frames", f"{results['progress']['frames']} frames in {results['progress']['chunks']} chunks, "
+                            f"{results['progress']['elapsed_ms']:.0f} ms"),
+        ("interrupt", f"median {results['interrupt']['median_ms']:.1f} ms, "
+                      f"exit {results['interrupt']['exit_statuses']}"),
+        ("pwd round-trip", f"median {results['pwd_roundtrip']['median_ms']:.2f} ms, "
+                           f"p90 {results['pwd_roundtrip']['p90_ms']:.2f} ms"),
+        ("link probe", f"RTT {results['link_probe']['rtt_ms']:.2f} ms, {results['link_probe']['mb_per_s']:.1f} MB/s, "
+                       f"recommends {results['link_probe']['recommended']}"),
+    ]
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"{name.ljust(width)}  {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SSHManager against a local stand-in server.")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions for latency benchmarks")
+    parser.add_argument("--megabytes", type=float, default=16, help="payload size for throughput benchmarks")
+    parser.add_argument("--frames", type=int, default=20000, help="progress frames to stream")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help="transport profile (default: paramiko defaults)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run_all(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+# Feeds synthetic find output for a dataset-sized home into FileTreeModel, no remote host needed:
+#   python -m benchmarks.treeModelBench [--paths N] [--per-folder N] [--dir-cap N] [--runs N] [--baseline] [--json]
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QGuiApplication, QIcon, QStandardItem, QStandardItemModel
+
+from gui.projectSettings.pages.fileTreeModel import FileTreeModel, PATH_ROLE, TYPE_ROLE
+
+# Bytes handed to a scan at a time, about what one read off the exec channel brings
+CHUNK = 65536
+
+
+def find_output(paths, per_folder):
+    """Shards of per_folder files under ./data/split_*/, printed the way build_find_command prints them."""
+    lines = ["./data/"] + [f"./data/split_{split}/" for split in range(4)]
+    shard = 0
+    while len(lines) < paths:
+        folder = f"./data/split_{shard % 4}/shard_{shard:05d}"
+        lines.append(folder + "/")
+        lines.extend(f"{folder}/sample_{index:06d}.{'py' if index % 10 == 0 else 'jpg'}"
+                     for index in range(min(per_folder, paths - len(lines))))
+        shard += 1
+    text = "".join(line + "\n" for line in lines)
+    return [text[start:start + CHUNK] for start in range(0, len(text), CHUNK)], len(lines)
+
+
+def scan(model, chunks):
+    tree_scan = model.start_scan()
+    for chunk in chunks:
+        tree_scan.feed(chunk)
+    tree_scan.finish(True)
+
+
+def timed(func, runs):
+    samples = []
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "best_ms": min(samples)}
+
+
+def bench_build(chunks, runs, dir_cap):
+    def build():
+        model = FileTreeModel()
+        model.dir_cap = dir_cap
+        scan(model, chunks)
+    return timed(build, runs)
+
+
+def bench_memory(chunks, dir_cap):
+    """Python allocations left behind by a build; the model keeps nothing on the C++ side per node."""
+    gc.collect()
+    tracemalloc.start()
+    model = FileTreeModel()
+    model.dir_cap = dir_cap
+    scan(model, chunks)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = model.node_count()
+    return {"nodes": nodes, "bytes_per_node": current / nodes, "peak_bytes_per_node": peak / nodes}
+
+
+def bench_rescan(chunks, runs, dir_cap):
+    """Scans of an unchanged home after the first, which diff against the tree instead of rebuilding it."""
+    model = FileTreeModel()
+    model.dir_cap = dir_cap
+    scan(model, chunks)
+    return timed(lambda: scan(model, chunks), runs)
+
+
+def bench_expand(chunks, dir_cap):
+    """First rows of a shard folder: sorting it, then the roles the view asks for."""
+    model = FileTreeModel()
+    model.dir_cap = dir_cap
+    scan(model, chunks)
+    data = model.index(0, 0)
+    split = model.index(0, 0, data)
+    shard = model.index(0, 0, split)
+    start = time.perf_counter()
+    for row in range(model.rowCount(shard)):
+        index = model.index(row, 0, shard)
+        index.data()
+        index.data(TYPE_ROLE)
+        index.data(PATH_ROLE)
+    return {"rows": model.rowCount(shard), "elapsed_ms": (time.perf_counter() - start) * 1000}
+
+
+def bench_baseline(chunks):
+    """One QStandardItem per path with its icon and roles, as the tree was built before."""
+    icons = {"folder": QIcon("gui/icons/editor/folder_light.png"), "python": QIcon("gui/icons/editor/python.png"),
+             "file": QIcon("gui/icons/document.png")}
+    gc.collect()
+    start = time.perf_counter()
+    model = QStandardItemModel()
+    folders = {".": model.invisibleRootItem()}
+    for line in "".join(chunks).splitlines():
+        is_dir = line.endswith("/")
+        path = line.rstrip("/")
+        parent_path, _, name = path.rpartition("/")
+        item = QStandardItem(name)
+        item.setEditable(False)
+        item.setData(path[2:], PATH_ROLE)
+        item_type = "folder" if is_dir else "python" if name.endswith(".py") else "file"
+        item.setData(item_type, TYPE_ROLE)
+        item.setIcon(icons[item_type])
+        folders[parent_path].appendRow(item)
+        if is_dir:
+            folders[path] = item
+    return {"elapsed_ms": (time.perf_counter() - start) * 1000}
+
+
+def run_all(args):
+    chunks, paths = find_output(args.paths, args.per_folder)
+    results = {
+        "paths": paths,
+        "build": bench_build(chunks, args.runs, args.dir_cap),
+        "memory": bench_memory(chunks, args.dir_cap),
+        "rescan": bench_rescan(chunks, args.runs, args.dir_cap),
+        "expand": bench_expand(chunks, args.dir_cap),
+    }
+    if args.baseline:
+        results["baseline"] = bench_baseline(chunks)
+    return results
+
+
+def print_table(results):
+    memory = results["memory"]
+    rows = [
+        ("paths", f"{results['paths']:,}"),
+        ("build", f"median {results['build']['median_ms']:.0f} ms, best {results['build']['best_ms']:.0f} ms"),
+        ("memory", f"{memory['bytes_per_node']:.1f} bytes/node ({memory['peak_bytes_per_node']:.1f} at peak), "
+                   f"{memory['nodes'] * memory['bytes_per_node'] / 2 ** 20:.1f} MB"),
+        ("rescan", f"median {results['rescan']['median_ms']:.0f} ms, best {results['rescan']['best_ms']:.0f} ms"),
+        ("expand", f"{results['expand']['rows']} rows in {results['expand']['elapsed_ms']:.1f} ms"),
+    ]
+    if "baseline" in results:
+        rows.append(("QStandardItem build", f"{results['baseline']['elapsed_ms']:.0f} ms"))
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"{name.ljust(width)}  {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the file tree model on find output for a large home.")
+    parser.add_argument("--paths", type=int, default=1000000, help="lines of find output")
+    parser.add_argument("--per-folder", type=int, default=1000, help="files per shard folder")
+    parser.add_argument("--dir-cap", type=int, default=500, help="rows shown per folder before \"Show N more\"")
+    parser.add_argument("--runs", type=int, default=3, help="repetitions for timed benchmarks")
+    parser.add_argument("--baseline", action="store_true", help="also build one QStandardItem per path (slow)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    results = run_all(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
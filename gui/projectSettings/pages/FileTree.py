@@ -9,16 +9,22 @@ Email: sam.grouchnikov@gmail.com
 Status: Development
 """
 
+import posixpath
+import shlex
 
 from PyQt6.QtCore import QRegularExpression
 from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QIcon, QStandardItemModel, QStandardItem, QCursor, QPixmap
+from PyQt6.QtGui import QIcon, QCursor, QPixmap
 from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTreeView,
     QPushButton, QPlainTextEdit, QFileDialog, QMessageBox, QLabel, QFrame, QSizePolicy, QGraphicsDropShadowEffect
 )
-from scp import SCPClient
+
+from backend.ssh.remoteListing import DEFAULT_DIR_CAP
+from backend.ssh.sshManager import SSHListDirWorker, SSHTransferWorker
+from .channelMonitor import format_bytes
+from .fileTreeModel import FileTreeModel, PATH_ROLE, TYPE_ROLE
 
 
 class CustomButton(QPushButton):
@@ -86,43 +92,6 @@ class PythonHighlighter(QSyntaxHighlighter):
                 self.setFormat(match.capturedStart(), match.capturedLength(), format)
 
 
-def build_nested_dict(paths):
-    tree = {}
-
-    for path in paths:
-        clean_path = path.strip()
-        if not clean_path or clean_path == ".":
-            continue
-
-        if clean_path.startswith("./"):
-            clean_path = clean_path[2:]
-        elif clean_path.startswith("."):
-            clean_path = clean_path[1:]
-
-        parts = clean_path.split('/')
-        current_level = tree
-
-        # Iterate through all parts except the very last one
-        for i in range(len(parts)):
-            part = parts[i]
-            if not part:
-                continue
-
-            is_last = (i == len(parts) - 1)
-
-            if is_last:
-                # If it's the last part, and it's not already a folder, mark as file
-                if part not in current_level:
-                    current_level[part] = None  # None indicates a file
-            else:
-                # If it's not the last part, it MUST be a folder
-                if part not in current_level or not isinstance(current_level[part], dict):
-                    current_level[part] = {}
-                current_level = current_level[part]
-
-    return tree
-
-
 class FileTreePage(QWidget):
     def __init__(self, run_func, home_dir, config, ssh_manager, update_func):
         super().__init__()
@@ -132,6 +101,15 @@ class FileTreePage(QWidget):
         self.config = config
         self.ssh_manager = ssh_manager
         self.current_open_path = None
+        self.transfer_worker = None
+        # Folders are listed over SFTP when expanded; cleared for servers without SFTP
+        self.lazy = True
+        self.list_workers = set()
+        self.pending_dirs = set()
+        # Bumped whenever the model is rebuilt, so listings requested before that are dropped
+        self.tree_generation = 0
+        # (manager, home) the tree was loaded or scanned for; refreshes of the same root are diffed
+        self.loaded_root = None
 
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(5, 5, 5, 5)
@@ -182,11 +160,16 @@ class FileTreePage(QWidget):
         self.transfer_button.clicked.connect(self.transfer_remote_file)
         self.transfer_button.setEnabled(False)
 
+        # Progress and throughput of the running download
+        self.transfer_label = QLabel("")
+        self.transfer_label.setStyleSheet("color: #888; font-size: 13px")
+
         self.top_layout.addWidget(self.reload_button)
         self.top_layout.addSpacing(362)
         self.top_layout.addWidget(self.scan_button)
         self.top_layout.addWidget(self.suggest_button)
         self.top_layout.addStretch()
+        self.top_layout.addWidget(self.transfer_label)
         self.top_layout.addWidget(self.save_button)
         self.top_layout.addWidget(self.transfer_button)
 
@@ -238,7 +221,10 @@ class FileTreePage(QWidget):
         self.line1.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         self.tree_container_layout.addWidget(self.line1)
 
-        self.model = QStandardItemModel()
+        self.model = FileTreeModel()
+        # Rows shown per folder; the rest wait behind a "Show N more" item
+        self.model.dir_cap = DEFAULT_DIR_CAP
+        self.model.listing_requested.connect(self.request_listing)
         self.tree_layout = QVBoxLayout()
         self.tree_layout.setContentsMargins(15, 0, 15, 0)
 
@@ -250,6 +236,8 @@ class FileTreePage(QWidget):
         self.tree.setHeaderHidden(True)
         self.tree.setIndentation(25)
         self.tree.setIconSize(QSize(17, 17))
+        # Every row is one line of text, so the view can skip measuring each of them
+        self.tree.setUniformRowHeights(True)
         self.tree_layout.addWidget(self.tree)
 
         self.tree_container_layout.addLayout(self.tree_layout)
@@ -322,16 +310,23 @@ class FileTreePage(QWidget):
     def update_home(self, new):
         self.home_dir = new
 
+    def reload_manager(self, manager):
+        self.ssh_manager = manager
+        self.lazy = True
+        self.loaded_root = None
+
     def on_file_selected(self, index):
-        item = self.model.itemFromIndex(index)
-        if not item.hasChildren():
-            file_path = item.data(Qt.ItemDataRole.UserRole)
+        if index.data(TYPE_ROLE) == "more":
+            self.model.show_more(index)
+            return
+        if self.is_file_item(index):
+            file_path = index.data(PATH_ROLE)
             self.current_open_path = "" + self.home_dir + "/" + file_path
             self.load_remote_file(self.current_open_path)
 
     def load_remote_file(self, path):
         self.editor.setPlainText(f"Loading {path}...")
-        cmd = f"cat '{path}'"
+        cmd = f"cat {shlex.quote(path)}"
         self.run_func(cmd, is_file_read=True)
         split = path.split("/")
         last = split[len(split) - 1]
@@ -348,18 +343,27 @@ class FileTreePage(QWidget):
         self.save_button.setEnabled(True)
         self.transfer_button.setEnabled(True)
 
+    def show_file_error(self, message):
+        self.editor.setPlainText(f"Could not open file: {message}")
+        self.editor.setReadOnly(True)
+        self.save_button.setEnabled(False)
+        self.transfer_button.setEnabled(False)
+
     def save_remote_file(self):
         if not self.current_open_path:
             return
 
 
         content = self.editor.toPlainText()
+        if not content.endswith("\n"):
+            content += "\n"
 
-        command = f"cat << 'EOF' > {self.current_open_path}\n{content}\nEOF"
+        # Content goes over stdin, so a line reading "EOF" can no longer cut the file short
+        command = f"cat > {shlex.quote(self.current_open_path)}"
 
         self.save_button.setEnabled(False)
 
-        self.run_func(command, is_file_save=True)
+        self.run_func(command, is_file_save=True, stdin=content)
 
         # Reset button after a short delay or via the 'finished' signal
         self.save_button.text_label.setText("Save Changes")
@@ -369,96 +373,126 @@ class FileTreePage(QWidget):
         if not self.current_open_path:
             return
 
+        if self.transfer_worker and self.transfer_worker.isRunning():
+            return
+        if self.ssh_manager is None or not self.ssh_manager.is_active():
+            QMessageBox.critical(self, "Transfer Failed", "Not connected")
+            return
+
         local_dir = QFileDialog.getExistingDirectory(self, "Select Save Folder")
 
         if local_dir:
-            try:
-                transport = self.ssh_manager.client.get_transport()
-
-                with SCPClient(transport) as scp:
-                    scp.get(self.current_open_path, local_dir)
-
-                QMessageBox.information(self, "Success", "File transferred successfully!")
-
-            except Exception as e:
-                QMessageBox.critical(self, "Transfer Failed", f"Error: {str(e)}")
-
-    def rebuild_tree(self, raw_find_output):
-
-        # Completely clear the existing items
-        self.model.clear()
-
-        # Parse the raw SSH string into a nested dict
-        paths = [p for p in raw_find_output.split('\n')]
-
-        nested_data = build_nested_dict(paths)
-
-        # Populate the model starting from the invisible root
-        self.populate_tree(self.model.invisibleRootItem(), nested_data)
-
-    def populate_tree(self, parent_item, data_dict, current_full_path=""):
-        # Sort: Folders first, then Alphabetical
-        sorted_names = sorted(data_dict.keys(), key=lambda s: (not data_dict[s], s.lower()))
-
-        for name in sorted_names:
-            item = QStandardItem(name)
-            item.setEditable(False)
-
-            item_path = f"{current_full_path}/{name}" if current_full_path else name
-            item.setData(item_path, Qt.ItemDataRole.UserRole)
-
-            # 1. Folder Check: Must be a dictionary
-            if isinstance(data_dict[name], dict):
-                item.setData("folder", Qt.ItemDataRole.UserRole + 1)
-                item.setIcon(QIcon("gui/icons/editor/folder_light.png"))
-                parent_item.appendRow(item)
-
-                # Only recurse if the folder actually has contents
-                if data_dict[name]:
-                    self.populate_tree(item, data_dict[name], item_path)
+            # Runs off the UI thread; the manager paces it so the shell stays responsive
+            self.transfer_button.setEnabled(False)
+            self.transfer_label.setText("Starting download...")
+            self.transfer_worker = SSHTransferWorker(self.ssh_manager, self.current_open_path, local_dir)
+            self.transfer_worker.progress_changed.connect(self.show_transfer_progress)
+            self.transfer_worker.completed.connect(self.transfer_completed)
+            self.transfer_worker.failed.connect(self.transfer_failed)
+            self.transfer_worker.start()
+
+    def show_transfer_progress(self, sent, size, rate):
+        percent = sent * 100 // size if size else 100
+        self.transfer_label.setText(f"{percent}% of {format_bytes(size)} - {format_bytes(rate)}/s")
+
+    def transfer_completed(self, local_path):
+        self.transfer_button.setEnabled(True)
+        self.transfer_label.setText("")
+        QMessageBox.information(self, "Success", f"File transferred successfully to {local_path}")
 
-            # 2. Python File Check: Must NOT be a dict, and end in .py
-            elif name.lower().endswith(".py"):
-                item.setData("python", Qt.ItemDataRole.UserRole + 1)
-                item.setIcon(QIcon("gui/icons/editor/python.png"))
-                parent_item.appendRow(item)
+    def transfer_failed(self, error):
+        self.transfer_button.setEnabled(True)
+        self.transfer_label.setText("")
+        QMessageBox.critical(self, "Transfer Failed", f"Error: {error}")
+
+    def clear_tree(self, lazy=False):
+        self.model.reset(lazy)
+        self.tree_generation += 1
+        self.pending_dirs.clear()
+        self.loaded_root = None
+
+    def load_root(self):
+        """
+        Shows the top level of home and lists folders as they are expanded. Called
+        again for the same home, it re-lists every loaded folder and applies only
+        the differences. Returns False without SFTP.
+        """
+        if not self.lazy or self.ssh_manager is None or self.ssh_manager.sftp_unavailable:
+            return False
+        root = (self.ssh_manager, self.home_dir)
+        if self.loaded_root != root or not self.model.lazy:
+            self.clear_tree(lazy=True)
+            self.loaded_root = root
+        for rel_path in set(self.model.loaded_folders()) | {""}:
+            self.request_listing(rel_path)
+        return True
+
+    def request_listing(self, rel_path):
+        if rel_path in self.pending_dirs or not self.home_dir:
+            return
+        self.pending_dirs.add(rel_path)
+        generation = self.tree_generation
+        worker = SSHListDirWorker(self.ssh_manager, posixpath.join(self.home_dir, rel_path) if rel_path else self.home_dir)
+        self.list_workers.add(worker)
+        worker.completed.connect(lambda _path, entries, cached: self.apply_listing(generation, rel_path, entries, cached))
+        worker.failed.connect(lambda _path, error: self.listing_failed(generation, rel_path, error))
+        worker.finished.connect(lambda: self.list_workers.discard(worker))
+        worker.start()
+
+    def apply_listing(self, generation, rel_path, entries, cached=False):
+        if generation != self.tree_generation:
+            return
+        self.pending_dirs.discard(rel_path)
+        folder = self.model.folder_node(rel_path)
+        if folder is None:
+            return
+        if cached and self.model.is_loaded(folder):
+            # Same mtime as when it was last listed, so the rows already match
+            return
+        self.model.set_children(folder, [(entry.name, entry.is_dir) for entry in entries])
 
-            # 3. Generic File Check
-            else:
-                item.setData("file", Qt.ItemDataRole.UserRole + 1)
-                item.setIcon(QIcon("gui/icons/document.png"))
-                parent_item.appendRow(item)
+    def listing_failed(self, generation, rel_path, error):
+        if generation != self.tree_generation:
+            return
+        self.pending_dirs.discard(rel_path)
+        if self.ssh_manager.sftp_unavailable:
+            # No SFTP on this server: go back to one find scan of the whole tree
+            self.lazy = False
+            self.update_func()
+            return
+        folder = self.model.folder_node(rel_path)
+        if folder is not None:
+            self.model.listing_failed(folder, f"Could not list folder: {error}")
+
+    @staticmethod
+    def is_file_item(index):
+        return index.data(TYPE_ROLE) in ("python", "file")
+
+    def start_tree_scan(self):
+        """
+        Returns a TreeScan that find output can be fed into as it arrives. The first
+        scan of a home builds the tree; later ones update it in place.
+        """
+        root = (self.ssh_manager, self.home_dir)
+        if self.loaded_root != root or self.model.lazy:
+            self.clear_tree()
+            self.loaded_root = root
+        return self.model.start_scan()
 
     def on_item_double_clicked(self, index):
-        item = self.model.itemFromIndex(index)
-        file_path = item.data(Qt.ItemDataRole.UserRole)
+        file_path = index.data(PATH_ROLE)
 
         # Don't try to 'cat' folders
-        if item.hasChildren():
+        if not self.is_file_item(index):
             return
 
         # Trigger the load via SSH
-        self.run_func(f"cat '{file_path}'", is_file_read=True)
+        self.run_func(f"cat {shlex.quote(file_path)}", is_file_read=True)
 
     def update_tree_icons(self, folder_icon_path, file_icon_path):
-        root = self.model.invisibleRootItem()
-        python_icon_path = "gui/icons/editor/python.png"
-
-        def traverse(item):
-            for i in range(item.rowCount()):
-                child = item.child(i)
-                item_type = child.data(Qt.ItemDataRole.UserRole + 1)
-
-                if item_type == "folder":
-                    child.setIcon(QIcon(folder_icon_path))
-                elif item_type == "python":
-                    child.setIcon(QIcon(python_icon_path))
-                else:
-                    child.setIcon(QIcon(file_icon_path))
-
-                traverse(child)
-
-        traverse(root)
+        # Icons are handed out per row by the model, so swapping them is one repaint
+        self.model.set_icons(QIcon(folder_icon_path), QIcon("gui/icons/editor/python.png"), QIcon(file_icon_path))
+        self.tree.viewport().update()
 
     def set_light_mode(self):
         self.update_tree_icons("gui/icons/editor/folder_light.png", "gui/icons/document.png")
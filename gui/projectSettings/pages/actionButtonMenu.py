@@ -17,6 +17,8 @@ from PyQt6.QtGui import QTextCursor, QTextCharFormat, QColor
 from PyQt6.QtWidgets import QPlainTextEdit, QInputDialog
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QFrame, QPushButton
 
+from backend.ssh.detachedRuns import LAUNCH_MODES
+
 
 class ActionButtonMenu(QWidget):
     def __init__(self, console, run_func=None, connect_func=None):
@@ -101,8 +103,8 @@ class ActionButtonMenu(QWidget):
         self.create_venv_btn = self.make_btn("Create Virtual Environment", "#1D405F")
 
         def create_venv():
-            self.run_func("python3 -m venv venv")
-            self.run_func(". venv/bin/activate")
+            # One pipelined batch: activation is skipped if creating the venv fails
+            self.run_func("Create Virtual Environment", steps=["python3 -m venv venv", ". venv/bin/activate"])
 
         self.create_venv_btn.clicked.connect(create_venv)
 
@@ -126,8 +128,15 @@ class ActionButtonMenu(QWidget):
             print(f"Running command (1): {command}")
             if not file.endswith(".py") and not '.' in file:
                 command += f".py"
+
+            modes = {"Foreground": None}
+            modes.update({f"Detached ({mode})": mode for mode in LAUNCH_MODES})
+            choice, ok = QInputDialog.getItem(self, "Run File", "Launch mode:", list(modes), 0, False)
+            if not ok:
+                return
             print("Running command:", command)
-            self.run_func(command)
+            # Detached runs keep training if the connection drops; their log is tailed into the console
+            self.run_func(command, detached_mode=modes[choice])
 
     def create_navigation_section(self):
         layout = QVBoxLayout()
@@ -202,7 +211,8 @@ class ActionButtonMenu(QWidget):
         self.dir_btn.clicked.connect(lambda: self.run_func("ls"))
         r2.addWidget(self.dir_btn)
         self.status_btn = self.make_btn("GPU Status", "#1D405F")
-        self.status_btn.clicked.connect(lambda: self.run_func("nvidia-smi"))
+        # Read-only, so it runs on its own exec channel instead of waiting behind the shell
+        self.status_btn.clicked.connect(lambda: self.run_func("nvidia-smi", is_status=True))
         r2.addWidget(self.status_btn)
         r2.addStretch()
 
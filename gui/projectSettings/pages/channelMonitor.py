@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QLabel
+
+
+def format_bytes(amount):
+    for unit in ("B", "KB", "MB", "GB"):
+        if amount < 1024 or unit == "GB":
+            return f"{amount:.0f} {unit}" if unit == "B" else f"{amount:.1f} {unit}"
+        amount /= 1024
+
+
+class ChannelMonitor(QDialog):
+    """Live per-channel byte counts and throughput from the manager's BandwidthScheduler."""
+
+    COLUMNS = ["Channel", "Class", "Transferred", "Rate", "State"]
+
+    def __init__(self, manager, is_dark=False, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.setWindowTitle("Channel Throughput")
+        self.resize(700, 320)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.caps_label = QLabel()
+        layout.addWidget(self.caps_label)
+
+        if is_dark:
+            self.setStyleSheet("background-color: #1E1B26; color: #C4C4C4;")
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(500)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    def refresh(self):
+        scheduler = self.manager.scheduler
+        rows = scheduler.snapshot()
+        self.table.setRowCount(len(rows))
+        for row, channel in enumerate(rows):
+            values = [channel["name"], channel["kind"], format_bytes(channel["bytes"]),
+                      f"{format_bytes(channel['rate'])}/s", "open" if channel["open"] else "done"]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+        cap = scheduler.current_bulk_rate()
+        state = "input just sent, bulk yielding" if scheduler.interactive_busy() else "no recent input"
+        self.caps_label.setText(f"Bulk limit now: {format_bytes(cap) + '/s' if cap else 'unlimited'} ({state})")
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
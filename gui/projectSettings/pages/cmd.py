@@ -20,6 +20,14 @@ from PyQt6.QtWidgets import (
 
 from pathlib import Path
 import sys
+
+from .channelMonitor import ChannelMonitor
+from .diagnosticsPanel import DiagnosticsPanel
+from .spoolViewer import SpoolViewer
+
+# Output bubbles keep only this many trailing characters; the full output is spooled to disk
+TAIL_WINDOW_CHARS = 64 * 1024
+TAIL_NOTICE = "[... earlier output saved to disk - Actions > View Full Output]\n"
 def resource_path(relative_path: str) -> str:
     # PyInstaller onefile
     if getattr(sys, "frozen", False):
@@ -37,7 +45,7 @@ def resource_path(relative_path: str) -> str:
 
 
 class cmdPage(QWidget):
-    def __init__(self, shared_manager, run_func, connect_func, setup_env):
+    def __init__(self, shared_manager, run_func, connect_func, setup_env, menu_actions=None):
         super().__init__()
         # Use the manager and function passed from content.py
         self.manager = shared_manager
@@ -45,6 +53,15 @@ class cmdPage(QWidget):
         self.connect_func = connect_func
         self.is_dark = False
         self.setup_env = setup_env
+        # Tool/action menu entries handled by the main window, keyed by action name
+        self.menu_actions = menu_actions or {}
+        # OutputSpool of the most recent shell command
+        self.last_spool = None
+        # Earlier spools still being written or viewed; closed by set_spool once neither holds
+        self.retired_spools = []
+        self.spool_viewer = None
+        self.channel_monitor = None
+        self.diagnostics_panel = None
         self.initUI()
 
     def initUI(self):
@@ -87,9 +104,15 @@ class cmdPage(QWidget):
         # If not initialized yet, add: self.dir_label = QLabel("Not Connected")
         self.dir_label.setStyleSheet("font-weight: 500; color: #5f6368;")
 
+        # Pending command count, hidden while nothing is queued
+        self.queue_label = QLabel("")
+        self.queue_label.setFixedHeight(20)
+        self.queue_label.hide()
+
         # 3. Add only the dot and the directory label
         self.status_layout.addWidget(self.status_dot)
         self.status_layout.addWidget(self.dir_label)
+        self.status_layout.addWidget(self.queue_label)
 
         # 4. Shrink-to-fit logic
         # Set size policy so it doesn't try to take up extra space
@@ -230,7 +253,13 @@ class cmdPage(QWidget):
         )
         actions = [
             ("Auto Environment Setup", self.setup_env),
-            ("Reset Directory",  lambda: self.run_func("cd ~"))
+            ("Reset Directory",  lambda: self.run_func("cd ~")),
+            ("Run Detached...", lambda: self.run_menu_action("run_detached")),
+            ("Reattach to Run...", lambda: self.run_menu_action("reattach_run")),
+            ("Attach to Log File...", lambda: self.run_menu_action("tail_log")),
+            ("Detach from Log File", lambda: self.run_menu_action("stop_tail")),
+            ("Recommend Transport Profile", lambda: self.run_menu_action("probe_link")),
+            ("Run on Fleet...", lambda: self.run_menu_action("run_fleet"))
             # ("Scan Dependency Imports", self.dummy_func),
             # ("System Health Check", self.dummy_func),
             # ("Clean Up Zombie Processes", self.dummy_func)
@@ -241,6 +270,11 @@ class cmdPage(QWidget):
             action.triggered.connect(slot)
             self.tools_menu.addAction(action)
 
+    def run_menu_action(self, name):
+        action = self.menu_actions.get(name)
+        if action:
+            action()
+
     def show_tools_menu_above(self):
         menu_width = self.tools_menu.sizeHint().width()
         menu_height = self.tools_menu.sizeHint().height()
@@ -264,6 +298,10 @@ class cmdPage(QWidget):
         actions = [
             ("Clear Console", self.clear_console),
             ("Terminate Run", lambda _=False: self.handle_interrupt()),
+            ("Cancel Queued Commands", lambda: self.run_menu_action("cancel_queued")),
+            ("View Full Output", self.open_spool_viewer),
+            ("Channel Throughput", self.open_channel_monitor),
+            ("Command Diagnostics", self.open_diagnostics_panel),
             ("Disconnect", lambda: self.run_func("exit")),
         ]
 
@@ -326,9 +364,13 @@ class cmdPage(QWidget):
         self.chat_layout.addSpacing(10)
         self.chat_layout.addWidget(self.current_bubble)
         self.chat_layout.addSpacing(10)
+        return self.current_bubble
 
-    def update_live_output(self, raw_text):
-        if not hasattr(self, 'current_bubble') or self.current_bubble is None:
+    def update_live_output(self, raw_text, bubble=None):
+        # Renders into the latest command bubble unless a specific one (e.g. a log tail) is given
+        if bubble is None:
+            bubble = getattr(self, 'current_bubble', None)
+        if bubble is None:
             return
 
         if "SYNC_DIR:" in raw_text:
@@ -365,17 +407,22 @@ class cmdPage(QWidget):
                 parts = clean_text.split('\r')
                 latest = parts[-1].strip()
                 if latest:
-                    self.current_bubble.setText(latest)
+                    bubble.setText(latest)
 
 
             elif is_progress_bar:
                 val = clean_text.strip()
                 if val:
-                    self.current_bubble.setText(val)
+                    bubble.setText(val)
 
             else:
-                current_val = self.current_bubble.text()
-                self.current_bubble.setText(current_val + clean_text)
+                current_val = bubble.text()
+                if current_val.startswith(TAIL_NOTICE):
+                    current_val = current_val[len(TAIL_NOTICE):]
+                text = current_val + clean_text
+                if len(text) > TAIL_WINDOW_CHARS:
+                    text = TAIL_NOTICE + text[-TAIL_WINDOW_CHARS:]
+                bubble.setText(text)
 
             # 3. SCROLL
             QTimer.singleShot(10, lambda: self.scroll.verticalScrollBar().setValue(
@@ -383,7 +430,9 @@ class cmdPage(QWidget):
             ))
 
         except RuntimeError:
-            self.current_bubble = None
+            # Bubble was deleted by Clear Console
+            if bubble is getattr(self, 'current_bubble', None):
+                self.current_bubble = None
         QTimer.singleShot(10, lambda: self.scroll.verticalScrollBar().setValue(
             self.scroll.verticalScrollBar().maximum()
         ))
@@ -398,11 +447,65 @@ class cmdPage(QWidget):
             self.scroll.verticalScrollBar().maximum()
         ))
 
+    def set_spool(self, spool):
+        if self.last_spool:
+            self.retired_spools.append(self.last_spool)
+        self.last_spool = spool
+        # A fleet run can start while a shell command still writes its spool, so a retired
+        # spool is closed only once its worker has finished it and it is not on screen
+        keep = []
+        for previous in self.retired_spools:
+            if previous.is_finished() and not (self.spool_viewer and self.spool_viewer.isVisible()
+                                               and self.spool_viewer.spool is previous):
+                previous.close()
+            else:
+                keep.append(previous)
+        self.retired_spools = keep
+
+    def open_spool_viewer(self):
+        if self.last_spool is None:
+            self.add_message("System: No command output has been recorded yet")
+            return
+        if self.spool_viewer:
+            self.spool_viewer.close()
+        self.spool_viewer = SpoolViewer(self.last_spool, self.is_dark, self)
+        self.spool_viewer.show()
+
+    def open_channel_monitor(self):
+        if self.manager is None:
+            self.add_message("System: Connect first to see channel throughput")
+            return
+        if self.channel_monitor:
+            self.channel_monitor.close()
+        self.channel_monitor = ChannelMonitor(self.manager, self.is_dark, self)
+        self.channel_monitor.show()
+
+    def open_diagnostics_panel(self):
+        if self.diagnostics_panel:
+            self.diagnostics_panel.close()
+        self.diagnostics_panel = DiagnosticsPanel(self.is_dark, self)
+        self.diagnostics_panel.show()
+
     def update_directory_display(self, path):
         clean_path = path.strip()
         print("Updating to ", clean_path)
         self.dir_label.setText(f"Current Directory: {clean_path}")
 
+    def update_queue_status(self, shell_stats, background_stats):
+        depth = shell_stats["depth"] + background_stats["depth"]
+        if depth:
+            self.queue_label.setText(f"| Queued: {depth}")
+            self.queue_label.show()
+        else:
+            self.queue_label.hide()
+
+        self.queue_label.setToolTip(
+            f"Shell: {shell_stats['depth']} queued, avg wait {shell_stats['mean_wait']:.2f}s, "
+            f"max wait {shell_stats['max_wait']:.2f}s\n"
+            f"Background: {background_stats['depth']} queued, {background_stats['running']} running, "
+            f"avg wait {background_stats['mean_wait']:.2f}s, max wait {background_stats['max_wait']:.2f}s"
+        )
+
     def update_connection_status(self, connected: bool):
         if connected:
             self.status_label.setText("Status: Connected")
@@ -467,6 +570,7 @@ class cmdPage(QWidget):
                             }
                         """)
         self.dir_label.setStyleSheet("color: #3B3B3B; font-weight: 500; border: none;")
+        self.queue_label.setStyleSheet("color: #7D7D7D; font-weight: 500; border: none;")
         self.status_label.setStyleSheet("color: #3B3B3B; font-weight: 500;")
         if self.status_label.text() == "Status: Disconnected":
             self.status_dot.setStyleSheet(f"""
@@ -665,6 +769,7 @@ class cmdPage(QWidget):
                                     }
                                 """)
         self.dir_label.setStyleSheet("color: #AAA3AD; font-weight: 500; border: none;")
+        self.queue_label.setStyleSheet("color: #978E97; font-weight: 500; border: none;")
         self.status_label.setStyleSheet("color: #AAA3AD; font-weight: 500;")
         if self.status_label.text() == "Status: Disconnected":
             self.status_dot.setStyleSheet(f"""
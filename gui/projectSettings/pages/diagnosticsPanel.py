@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+import time
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QLabel, QPushButton, QFileDialog
+)
+
+from backend.ssh.commandMetrics import METRICS
+from .channelMonitor import format_bytes
+
+# Most recent commands listed under the summary
+RECENT_ROWS = 50
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.0f}" if value >= 10 else f"{value:.1f}"
+
+
+class DiagnosticsPanel(QDialog):
+    """Per-kind latency percentiles and the latest command timelines from METRICS."""
+
+    SUMMARY_COLUMNS = ["Kind", "Count", "Queue p50", "Send p50", "TTFB p50", "TTFB p90",
+                       "Total p50", "Total p90", "Total p99", "UI p50", "MB/s p50"]
+    RECENT_COLUMNS = ["When", "Kind", "Command", "Queue", "Send", "TTFB", "Total", "UI",
+                      "Bytes", "Chunks", "Exit"]
+
+    def __init__(self, is_dark=False, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Command Diagnostics")
+        self.resize(1100, 600)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Percentiles per command kind (times in ms). Send is channel setup and the "
+                                "request, TTFB is remote start plus one round trip, UI is the delay before "
+                                "output reached the console."))
+
+        self.summary_table = self._build_table(self.SUMMARY_COLUMNS)
+        layout.addWidget(self.summary_table, 1)
+        self.recent_table = self._build_table(self.RECENT_COLUMNS)
+        self.recent_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.recent_table, 2)
+
+        buttons = QHBoxLayout()
+        self.status_label = QLabel(f"Also logged to {METRICS.path}")
+        buttons.addWidget(self.status_label)
+        buttons.addStretch()
+        self.clear_btn = QPushButton("Clear")
+        self.clear_btn.clicked.connect(self.clear)
+        self.export_btn = QPushButton("Export JSON Lines...")
+        self.export_btn.clicked.connect(self.export)
+        buttons.addWidget(self.clear_btn)
+        buttons.addWidget(self.export_btn)
+        layout.addLayout(buttons)
+
+        if is_dark:
+            self.setStyleSheet("background-color: #1E1B26; color: #C4C4C4;")
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    @staticmethod
+    def _build_table(columns):
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        return table
+
+    @staticmethod
+    def _fill(table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+
+    def refresh(self):
+        rows = []
+        for kind, stats in sorted(METRICS.summary().items()):
+            def pct(field, p):
+                return format_ms(stats[field][p]) if field in stats else "-"
+            rows.append([kind, stats["count"], pct("queue_wait_ms", "p50"), pct("send_ms", "p50"),
+                         pct("ttfb_ms", "p50"), pct("ttfb_ms", "p90"), pct("total_ms", "p50"),
+                         pct("total_ms", "p90"), pct("total_ms", "p99"), pct("ui_ms", "p50"),
+                         pct("mb_per_s", "p50")])
+        self._fill(self.summary_table, rows)
+
+        rows = []
+        for entry in reversed(METRICS.records()[-RECENT_ROWS:]):
+            rows.append([time.strftime("%H:%M:%S", time.localtime(entry["time"])), entry["kind"], entry["command"],
+                         format_ms(entry["queue_wait_ms"]), format_ms(entry["send_ms"]), format_ms(entry["ttfb_ms"]),
+                         format_ms(entry["total_ms"]), format_ms(entry["ui_ms"]), format_bytes(entry["bytes"]),
+                         entry["chunks"], "-" if entry["exit_status"] is None else entry["exit_status"]])
+        self._fill(self.recent_table, rows)
+
+    def clear(self):
+        METRICS.clear()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Command Metrics", "easyssh-metrics.jsonl",
+                                              "JSON Lines (*.jsonl)")
+        if not path:
+            return
+        try:
+            count = METRICS.export(path)
+            self.status_label.setText(f"Exported {count} commands to {path}")
+        except OSError as e:
+            self.status_label.setText(f"Export failed: {e}")
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
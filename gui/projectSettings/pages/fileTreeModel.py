@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+from array import array
+from itertools import groupby
+
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt, pyqtSignal
+
+# Item roles: relative path and item type ("folder", "python", "file", "placeholder" or "more")
+PATH_ROLE = Qt.ItemDataRole.UserRole
+TYPE_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# Node kinds
+FILE, FOLDER, REMOVED = 0, 1, 2
+ROOT = 0
+
+# internalId of the rows that are not nodes, tagged with the folder they sit in:
+# "Show N more..." and the status line ("Loading..." or a listing error)
+MORE_ROW = 1 << 40
+STATUS_ROW = 2 << 40
+NODE_MASK = MORE_ROW - 1
+
+
+class FileTreeModel(QAbstractItemModel):
+    """
+    The remote tree as flat arrays indexed by node id instead of one QStandardItem
+    per path: parent ids, kinds, row numbers, and names as UTF-8 slices of one
+    bytearray. Folders hold an array of child ids. A node's internalId is its id and
+    everything the view asks for (text, icon, path, type) is worked out in data(),
+    so a node costs a few dozen bytes.
+
+    A folder's children are sorted (folders first, then by name) when the view
+    first asks for its rows; until then find output is only appended. Only the
+    first dir_cap rows of a folder are shown, the rest wait behind "Show N more".
+    """
+
+    # Relative path of a lazy folder the view expanded before it was listed
+    listing_requested = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dir_cap = 0
+        self.lazy = False
+        self.icons = {}
+        self.scan = None
+        self._clear()
+
+    def _clear(self):
+        self._parent = array("i", [-1])
+        self._kind = bytearray([FOLDER])
+        self._row = array("i", [0])
+        # Node i's name is _names[_offsets[i]:_offsets[i + 1]]
+        self._offsets = array("I", [0, 0])
+        self._names = bytearray()
+        # Child ids per folder, None for files
+        self._children = [array("i")]
+        # Folder path as find prints it ("." for home, "./a/b") -> node
+        self._folders = {b".": ROOT, b"": ROOT}
+        # Folders the view has asked for rows: folder -> rows shown. Their rows only
+        # change through insert/remove signals from here on.
+        self._shown = {ROOT: 0}
+        self._more = set()
+        # Folder -> listing error, shown as its only row
+        self._status = {}
+        self._unsorted = set()
+        # Lazy mode: folders listed, and folders waiting for their listing. Until its
+        # listing arrives a folder has a single "Loading..." row.
+        self._loaded = set()
+        self._loading = set()
+        # Rescans: 1 per node listed again, and per-folder {name: node} built as needed
+        self._seen = None
+        self._names_by_folder = {}
+
+    def reset(self, lazy=False):
+        self.beginResetModel()
+        self._clear()
+        self.lazy = lazy
+        self.scan = None
+        self.endResetModel()
+
+    def set_icons(self, folder_icon, python_icon, file_icon):
+        self.icons = {"folder": folder_icon, "python": python_icon, "file": file_icon}
+
+    def node_count(self):
+        """Nodes in the tree, home included."""
+        return len(self._kind) - self._kind.count(REMOVED)
+
+    # Qt model interface
+
+    def index(self, row, column, parent=QModelIndex()):
+        folder = self._folder_of(parent)
+        if folder is None or column != 0 or row < 0:
+            return QModelIndex()
+        shown = self._expose(folder)
+        if row < shown:
+            return self.createIndex(row, 0, self._children[folder][row])
+        if folder in self._more:
+            if row == shown:
+                return self.createIndex(row, 0, MORE_ROW | folder)
+            shown += 1
+        if row == shown and self._status_text(folder) is not None:
+            return self.createIndex(row, 0, STATUS_ROW | folder)
+        return QModelIndex()
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        if not index.isValid():
+            return QModelIndex()
+        item_id = index.internalId()
+        folder = item_id & NODE_MASK if item_id > NODE_MASK else self._parent[item_id]
+        return self._index_of(folder)
+
+    def rowCount(self, parent=QModelIndex()):
+        folder = self._folder_of(parent)
+        if folder is None:
+            return 0
+        return self._expose(folder) + (folder in self._more) + (self._status_text(folder) is not None)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        folder = self._folder_of(parent)
+        return folder is not None and (bool(self._children[folder]) or self._status_text(folder) is not None)
+
+    def canFetchMore(self, parent):
+        folder = self._folder_of(parent)
+        return (self.lazy and folder is not None
+                and folder not in self._loaded and folder not in self._loading)
+
+    def fetchMore(self, parent):
+        folder = self._folder_of(parent)
+        if not self.canFetchMore(parent):
+            return
+        self._loading.add(folder)
+        if self._status.pop(folder, None) is not None and folder in self._shown:
+            status = self._status_index(folder)
+            self.dataChanged.emit(status, status)
+        self.listing_requested.emit(self.path_of(folder))
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item_id = index.internalId()
+        if item_id > NODE_MASK:
+            folder = item_id & NODE_MASK
+            is_more = item_id < STATUS_ROW
+            if role == Qt.ItemDataRole.DisplayRole:
+                if is_more:
+                    return f"Show {len(self._children[folder]) - self._shown.get(folder, 0)} more..."
+                return self._status_text(folder)
+            if role == TYPE_ROLE:
+                return "more" if is_more else "placeholder"
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.name_of(item_id)
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icons.get(self.type_of(item_id))
+        if role == TYPE_ROLE:
+            return self.type_of(item_id)
+        if role == PATH_ROLE:
+            return self.path_of(item_id)
+        return None
+
+    # Nodes
+
+    def name_of(self, node):
+        return self._names[self._offsets[node]:self._offsets[node + 1]].decode("utf-8", "replace")
+
+    def type_of(self, node):
+        if self._kind[node] == FOLDER:
+            return "folder"
+        end = self._offsets[node + 1]
+        if end - self._offsets[node] >= 3 and self._names[end - 3:end].lower() == b".py":
+            return "python"
+        return "file"
+
+    def path_of(self, node):
+        """Path relative to home ("" for home itself)."""
+        parts = []
+        while node > ROOT:
+            parts.append(self.name_of(node))
+            node = self._parent[node]
+        return "/".join(reversed(parts))
+
+    def folder_node(self, rel_path):
+        node = self._folders.get(b"./" + rel_path.encode("utf-8", "surrogateescape") if rel_path else b".")
+        return node if node is not None and self._kind[node] == FOLDER else None
+
+    def is_loaded(self, folder):
+        return folder in self._loaded
+
+    def loaded_folders(self):
+        return [self.path_of(folder) for folder in self._loaded]
+
+    def _folder_of(self, index):
+        """Node behind index if it can have rows, None for virtual rows; the invalid index is home."""
+        if not index.isValid():
+            return ROOT
+        item_id = index.internalId()
+        return None if item_id > NODE_MASK or self._children[item_id] is None else item_id
+
+    def _index_of(self, node):
+        if node <= ROOT:
+            return QModelIndex()
+        return self.createIndex(self._row[node], 0, node)
+
+    def _key(self, node):
+        path = []
+        while node > ROOT:
+            path.append(self._names[self._offsets[node]:self._offsets[node + 1]])
+            node = self._parent[node]
+        return b"/".join([b"."] + path[::-1])
+
+    def _sort_key(self, node):
+        return self._kind[node] != FOLDER, self.name_of(node).lower()
+
+    def _sort(self, folder):
+        children = self._children[folder]
+        if len(children) > 1:
+            children[:] = array("i", sorted(children, key=self._sort_key))
+        self._unsorted.discard(folder)
+        self._renumber(folder, 0)
+
+    def _renumber(self, folder, start):
+        # Only folders need their row: parent() is never asked about a file. Sorted
+        # folders list theirs first, so the first file ends the walk.
+        kind, row = self._kind, self._row
+        children = self._children[folder]
+        sorted_folder = folder not in self._unsorted
+        for position in range(start, len(children)):
+            child = children[position]
+            if kind[child] == FOLDER:
+                row[child] = position
+            elif sorted_folder:
+                break
+
+    def _expose(self, folder):
+        """Rows shown for folder, sorting it the first time the view asks."""
+        shown = self._shown.get(folder)
+        if shown is None:
+            self._sort(folder)
+            count = len(self._children[folder])
+            shown = self._shown[folder] = min(count, self.dir_cap) if self.dir_cap else count
+            if count > shown:
+                self._more.add(folder)
+        return shown
+
+    def _new_nodes(self, parents, names, is_dir):
+        """Appends one node per (parent, name bytes) and returns the first new id."""
+        first = len(self._kind)
+        count = len(names)
+        self._parent.extend(parents)
+        self._kind.extend(bytes([FOLDER]) * count if is_dir else bytes(count))
+        self._row.extend(array("i", [0]) * count)
+        self._names.extend(b"".join(names))
+        # Node i's name is _names[_offsets[i]:_offsets[i + 1]], so each new node adds its end offset
+        end = self._offsets[-1]
+        ends = []
+        for name in names:
+            end += len(name)
+            ends.append(end)
+        self._offsets.extend(ends)
+        self._children.extend([array("i") for _ in range(count)] if is_dir else [None] * count)
+        return first
+
+    def _create(self, parent, name, is_dir, key=None):
+        # _new_nodes for a single node, which folders mostly come as
+        node = len(self._kind)
+        self._parent.append(parent)
+        self._kind.append(FOLDER if is_dir else FILE)
+        self._row.append(0)
+        self._names.extend(name)
+        self._offsets.append(self._offsets[-1] + len(name))
+        self._children.append(array("i") if is_dir else None)
+        if is_dir:
+            self._folders[key if key is not None else self._key(node)] = node
+        names = self._names_by_folder.get(parent)
+        if names is not None:
+            names[name] = node
+        return node
+
+    def _ensure_folder(self, key):
+        """Node for the folder find printed as key, creating it and any missing parents."""
+        node = self._folders.get(key)
+        if node is None:
+            parent_key, _, name = key.rpartition(b"/")
+            parent = self._ensure_folder(parent_key)
+            if self._seen is not None:
+                # A file became a folder
+                old = self._names_in(parent).pop(name, None)
+                if old is not None:
+                    self._remove(parent, {old})
+            node = self._create(parent, name, True, key)
+            self._append(parent, [node])
+        return node
+
+    def _append(self, folder, nodes):
+        """Adds children at the end of folder; shown folders get them as rows (up to dir_cap)."""
+        children = self._children[folder]
+        shown = self._shown.get(folder)
+        self._unsorted.add(folder)
+        if shown is None:
+            children.extend(nodes)
+            return
+        room = 0
+        if shown == len(children):
+            room = max(0, self.dir_cap - shown) if self.dir_cap else len(nodes)
+        if room:
+            visible = nodes[:room]
+            self.beginInsertRows(self._index_of(folder), shown, shown + len(visible) - 1)
+            children.extend(visible)
+            self._shown[folder] = shown + len(visible)
+            self._renumber(folder, shown)
+            self.endInsertRows()
+            nodes = nodes[room:]
+        if nodes:
+            self._add_hidden(folder, len(children), nodes)
+
+    def _add_hidden(self, folder, position, nodes):
+        """Inserts nodes past the shown rows of a shown folder, behind its "Show N more" row."""
+        children = self._children[folder]
+        if folder in self._more:
+            children[position:position] = array("i", nodes)
+            self._renumber(folder, position)
+            more = self._more_index(folder)
+            self.dataChanged.emit(more, more)
+            return
+        shown = self._shown[folder]
+        self.beginInsertRows(self._index_of(folder), shown, shown)
+        children[position:position] = array("i", nodes)
+        self._renumber(folder, position)
+        self._more.add(folder)
+        self.endInsertRows()
+
+    def _insert_sorted(self, folder, position, node):
+        children = self._children[folder]
+        shown = self._shown.get(folder)
+        if shown is None:
+            children.insert(position, node)
+            self._renumber(folder, position)
+            return
+        if position < shown or (position == shown == len(children) and (not self.dir_cap or shown < self.dir_cap)):
+            self.beginInsertRows(self._index_of(folder), position, position)
+            children.insert(position, node)
+            self._shown[folder] = shown + 1
+            self._renumber(folder, position)
+            self.endInsertRows()
+        else:
+            self._add_hidden(folder, position, [node])
+
+    def _remove(self, folder, doomed):
+        """Drops the child nodes in doomed (a set) from folder, with their subtrees."""
+        if not doomed:
+            return
+        children = self._children[folder]
+        positions = [position for position, child in enumerate(children) if child in doomed]
+        shown = self._shown.get(folder)
+        if shown is None:
+            children[:] = array("i", [child for child in children if child not in doomed])
+            if positions:
+                self._renumber(folder, positions[0])
+        else:
+            hidden = [position for position in positions if position >= shown]
+            if hidden:
+                last_hidden = len(hidden) == len(children) - shown
+                if last_hidden:
+                    self.beginRemoveRows(self._index_of(folder), shown, shown)
+                    self._more.discard(folder)
+                for position in reversed(hidden):
+                    del children[position]
+                self._renumber(folder, hidden[0])
+                if last_hidden:
+                    self.endRemoveRows()
+                else:
+                    more = self._more_index(folder)
+                    self.dataChanged.emit(more, more)
+            # Contiguous runs of shown rows, last run first so earlier positions stay valid
+            runs = []
+            for position in positions:
+                if position >= shown:
+                    break
+                if runs and position == runs[-1][-1] + 1:
+                    runs[-1].append(position)
+                else:
+                    runs.append([position])
+            for run in reversed(runs):
+                self.beginRemoveRows(self._index_of(folder), run[0], run[-1])
+                del children[run[0]:run[-1] + 1]
+                self._shown[folder] -= len(run)
+                self._renumber(folder, run[0])
+                self.endRemoveRows()
+        for node in doomed:
+            self._forget(node)
+
+    def _forget(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            children = self._children[node]
+            if children is not None:
+                self._folders.pop(self._key(node), None)
+                for index in (self._shown, self._status, self._names_by_folder):
+                    index.pop(node, None)
+                for index in (self._more, self._unsorted, self._loaded, self._loading):
+                    index.discard(node)
+                stack.extend(children)
+                self._children[node] = None
+            self._kind[node] = REMOVED
+
+    def _more_index(self, folder):
+        return self.createIndex(self._shown[folder], 0, MORE_ROW | folder)
+
+    def _index_for_id(self, item_id):
+        """Index of a node or virtual row as things stand now; invalid if it is gone or hidden."""
+        node = item_id & NODE_MASK
+        if node >= len(self._kind) or self._kind[node] == REMOVED:
+            return QModelIndex()
+        if item_id > NODE_MASK:
+            shown = self._shown.get(node)
+            if shown is None:
+                return QModelIndex()
+            if item_id < STATUS_ROW:
+                return self.createIndex(shown, 0, item_id) if node in self._more else QModelIndex()
+            return self._status_index(node) if self._status_text(node) is not None else QModelIndex()
+        parent = self._parent[node]
+        shown = self._shown.get(parent)
+        try:
+            row = self._children[parent].index(node)
+        except ValueError:
+            return QModelIndex()
+        return self.createIndex(row, 0, node) if shown is not None and row < shown else QModelIndex()
+
+    def _sort_shown(self):
+        """Sorts the shown folders that were appended to, as one layout change for the view."""
+        folders = [folder for folder in self._unsorted if folder in self._shown]
+        if not folders:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        ids = [index.internalId() for index in old]
+        for folder in folders:
+            self._sort(folder)
+        self.changePersistentIndexList(old, [self._index_for_id(item_id) for item_id in ids])
+        self.layoutChanged.emit()
+
+    # Rows past dir_cap and status lines
+
+    def show_more(self, index):
+        """Shows the next dir_cap rows hidden behind the "Show N more" row at index."""
+        folder = index.internalId() & NODE_MASK
+        if folder not in self._more:
+            return
+        shown = self._shown[folder]
+        count = len(self._children[folder])
+        end = min(count, shown + self.dir_cap) if self.dir_cap else count
+        # The row goes and comes back after the new rows rather than changing under the view
+        parent = self._index_of(folder)
+        self.beginRemoveRows(parent, shown, shown)
+        self._more.discard(folder)
+        self.endRemoveRows()
+        self.beginInsertRows(parent, shown, end - 1)
+        self._shown[folder] = end
+        self.endInsertRows()
+        if end < count:
+            self.beginInsertRows(parent, end, end)
+            self._more.add(folder)
+            self.endInsertRows()
+
+    def _status_text(self, folder):
+        text = self._status.get(folder)
+        if text is None and self.lazy and folder not in self._loaded:
+            return "Loading..."
+        return text
+
+    def _status_index(self, folder):
+        return self.createIndex(self._shown[folder] + (folder in self._more), 0, STATUS_ROW | folder)
+
+    # Lazy listings
+
+    def set_children(self, folder, entries):
+        """
+        Brings a listed folder's children in line with entries, (name, is_dir) pairs
+        sorted folders first. Only what changed is removed or inserted, so kept rows
+        keep their expanded state, their own children and the selection.
+        """
+        self._loading.discard(folder)
+        if folder in self._shown and self._status_text(folder) is not None:
+            row = self._status_index(folder).row()
+            self.beginRemoveRows(self._index_of(folder), row, row)
+            self._status.pop(folder, None)
+            self._loaded.add(folder)
+            self.endRemoveRows()
+        else:
+            self._status.pop(folder, None)
+            self._loaded.add(folder)
+        children = self._children[folder]
+        wanted = [(name.encode("utf-8", "surrogateescape"), is_dir) for name, is_dir in entries]
+        existing = {(bytes(self._names[self._offsets[child]:self._offsets[child + 1]]), self._kind[child] == FOLDER): child
+                    for child in children}
+        wanted_set = set(wanted)
+        self._remove(folder, {child for key, child in existing.items() if key not in wanted_set})
+        folder_key = self._key(folder)
+        if folder in self._shown:
+            # Both sides are sorted the same way, so one pass finds where the new ones go
+            position = 0
+            for name, is_dir in wanted:
+                if (name, is_dir) in existing:
+                    position += 1
+                    continue
+                node = self._create(folder, name, is_dir, folder_key + b"/" + name)
+                self._insert_sorted(folder, position, node)
+                position += 1
+        else:
+            for name, is_dir in wanted:
+                if (name, is_dir) not in existing:
+                    children.append(self._create(folder, name, is_dir, folder_key + b"/" + name))
+            self._sort(folder)
+
+    def listing_failed(self, folder, message):
+        """Shows message in place of the "Loading..." row; expanding the folder again retries."""
+        self._loading.discard(folder)
+        if folder in self._loaded:
+            return
+        self._status[folder] = message
+        if folder in self._shown:
+            status = self._status_index(folder)
+            self.dataChanged.emit(status, status)
+
+    # find scans
+
+    def start_scan(self):
+        """
+        Returns a TreeScan to feed find output into as it arrives. The first scan
+        builds the tree in bulk; later ones only add what is new and, once complete,
+        remove what was not listed again.
+        """
+        self.scan = TreeScan(self)
+        self._names_by_folder = {}
+        if self._children[ROOT]:
+            # Removed nodes start out as seen, so the sweep at the end skips them
+            self._seen = bytearray(kind == REMOVED for kind in self._kind)
+            self._seen[ROOT] = 1
+        else:
+            self._seen = None
+        return self.scan
+
+    def add_lines(self, lines):
+        """Complete find lines as bytes ("./a/b/" for folders, "./a/c" for files)."""
+        if self._seen is None:
+            self._add_new(lines)
+        else:
+            self._add_rescanned(lines)
+
+    def _add_new(self, lines):
+        # Folders one by one (their parents have to exist first), then every file in
+        # the chunk in bulk: find prints siblings together, so each run of files with
+        # the same parent is appended to it in one go
+        folders = self._folders
+        parents = []
+        names = []
+        for line in lines:
+            parent_key, _, name = line.rpartition(b"/")
+            if not name:
+                # Folder lines end with "/", which leaves them without a name
+                self._ensure_folder(parent_key)
+                continue
+            parent = folders.get(parent_key)
+            if parent is None:
+                parent = self._ensure_folder(parent_key)
+            parents.append(parent)
+            names.append(name)
+        if not names:
+            return
+        node = self._new_nodes(parents, names, False)
+        for parent, run in groupby(parents):
+            run_length = len(list(run))
+            self._append(parent, array("i", range(node, node + run_length)))
+            node += run_length
+
+    def _add_rescanned(self, lines):
+        # Lines with the same parent come in runs; a folder's own line ("./a/b/")
+        # splits into the same parent as its entries with an empty name
+        seen, kind = self._seen, self._kind
+        for parent_key, run in groupby((line.rpartition(b"/") for line in lines), lambda parts: parts[0]):
+            parent = self._ensure_folder(parent_key)
+            # Listing an entry vouches for the folders above it
+            folder = parent
+            while folder < len(seen) and not seen[folder]:
+                seen[folder] = 1
+                folder = self._parent[folder]
+            names = self._names_in(parent)
+            new = []
+            for _, _, name in run:
+                if not name:
+                    continue
+                node = names.get(name)
+                if node is not None:
+                    if kind[node] == FILE:
+                        if node < len(seen):
+                            seen[node] = 1
+                        continue
+                    # A folder became a file
+                    del names[name]
+                    self._remove(parent, {node})
+                new.append(name)
+            if new:
+                node = self._new_nodes([parent] * len(new), new, False)
+                names.update(zip(new, range(node, node + len(new))))
+                self._append(parent, array("i", range(node, node + len(new))))
+
+    def _names_in(self, folder):
+        """{name: node} of folder's children, kept for the rest of the scan."""
+        names = self._names_by_folder.get(folder)
+        if names is None:
+            offsets = self._offsets
+            names = {bytes(self._names[offsets[child]:offsets[child + 1]]): child for child in self._children[folder]}
+            self._names_by_folder[folder] = names
+        return names
+
+    def finish_scan(self, complete):
+        seen = self._seen
+        if complete and seen is not None:
+            # Whatever was in the tree before and was not listed again; nodes under a
+            # folder that goes too are dropped along with it
+            doomed = {}
+            node = seen.find(0)
+            while node != -1:
+                parent = self._parent[node]
+                if seen[parent]:
+                    doomed.setdefault(parent, set()).add(node)
+                node = seen.find(0, node + 1)
+            for parent, nodes in doomed.items():
+                if self._children[parent] is not None:
+                    self._remove(parent, nodes)
+        self._seen = None
+        self._names_by_folder = {}
+        self.scan = None
+        self._sort_shown()
+
+
+class TreeScan:
+    """One find run feeding a FileTreeModel. Starting a newer scan turns this one into a no-op."""
+
+    def __init__(self, model):
+        self.model = model
+        self.partial = b""
+
+    def feed(self, text):
+        if self.model.scan is not self:
+            return
+        lines = (self.partial + text.encode("utf-8", "surrogateescape")).split(b"\n")
+        self.partial = lines.pop()
+        self.model.add_lines(lines)
+
+    def finish(self, complete=True):
+        """complete is False for a scan cut short, whose missing lines say nothing about what was removed."""
+        if self.model.scan is not self:
+            return
+        if complete and self.partial:
+            self.model.add_lines([self.partial])
+        self.partial = b""
+        self.model.finish_scan(complete)
@@ -12,10 +12,14 @@ Status: Development
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QCursor, QColor
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QLineEdit,
+    QWidget, QVBoxLayout, QLabel, QLineEdit, QComboBox,
     QPushButton, QHBoxLayout, QGridLayout, QMessageBox, QFrame, QSizePolicy, QScrollArea, QGraphicsDropShadowEffect
 )
 
+from backend.ssh.bandwidthScheduler import RATE_CHOICES
+from backend.ssh.remoteListing import DEFAULT_DIR_CAP, DEFAULT_MAX_DEPTH, parse_excludes, parse_limit
+from backend.ssh.transportProfiles import PROFILE_CHOICES
+
 
 class SettingsPage(QWidget):
     def __init__(self, config, reload, fb):
@@ -91,6 +95,14 @@ class SettingsPage(QWidget):
         self.connection_row.ip.input.setText(str(config.get("ssh_ip")))
         self.connection_row.password.input.setText(str(config.get("ssh_psw")))
         self.connection_row.port.input.setText(str(config.get("ssh_port")))
+        self.connection_row.profile.set_value(config.get("ssh_profile") or "default")
+        self.connection_row.bulk_rate.set_value(config.get("bulk_rate_limit", 0))
+        self.connection_row.yield_rate.set_value(config.get("bulk_yield_rate", 1))
+        self.connection_row.jump_host.input.setText(str(config.get("jump_host") or ""))
+        self.connection_row.jump_password.input.setText(str(config.get("jump_psw") or ""))
+        self.connection_row.tree_excludes.input.setText(", ".join(parse_excludes(config.get("tree_excludes"))))
+        self.connection_row.tree_max_depth.input.setText(str(parse_limit(config.get("tree_max_depth"), DEFAULT_MAX_DEPTH)))
+        self.connection_row.tree_dir_cap.input.setText(str(parse_limit(config.get("tree_dir_cap"), DEFAULT_DIR_CAP)))
 
         self.integrations_row.gitblock.git_url.input.setText(str(config.get("git_url")))
         self.integrations_row.gitblock.git_pat.input.setText(str(config.get("git_pat")))
@@ -107,6 +119,14 @@ class SettingsPage(QWidget):
         self.config["ssh_ip"] = self.connection_row.ip.input.text()
         self.config["ssh_port"] = self.connection_row.port.input.text()
         self.config["ssh_psw"] = self.connection_row.password.input.text()
+        self.config["ssh_profile"] = self.connection_row.profile.value()
+        self.config["bulk_rate_limit"] = self.connection_row.bulk_rate.value()
+        self.config["bulk_yield_rate"] = self.connection_row.yield_rate.value()
+        self.config["jump_host"] = self.connection_row.jump_host.input.text().strip()
+        self.config["jump_psw"] = self.connection_row.jump_password.input.text()
+        self.config["tree_excludes"] = ", ".join(parse_excludes(self.connection_row.tree_excludes.input.text()))
+        self.config["tree_max_depth"] = parse_limit(self.connection_row.tree_max_depth.input.text(), DEFAULT_MAX_DEPTH)
+        self.config["tree_dir_cap"] = parse_limit(self.connection_row.tree_dir_cap.input.text(), DEFAULT_DIR_CAP)
         self.config["git_url"] = self.integrations_row.gitblock.git_url.input.text()
         self.config["git_pat"] = self.integrations_row.gitblock.git_pat.input.text()
         self.config["wandb_user"] = self.integrations_row.wandbblock.username.input.text()
@@ -275,7 +295,7 @@ class FormItem(QWidget):
         self.input.setFixedSize(width, 37)
         self.layout.addWidget(self.input)
 
-        if label in ["Password", "Personal Access Token", "API Key"]:
+        if label in ["Password", "Jump Host Password", "Personal Access Token", "API Key"]:
             self.input.setEchoMode(QLineEdit.EchoMode.Password)
 
     def set_light_mode(self):
@@ -290,6 +310,42 @@ class FormItem(QWidget):
 
 
 
+class FormCombo(QWidget):
+    def __init__(self, label, width, choices):
+        super().__init__()
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.label = QLabel(label)
+        self.layout.addWidget(self.label)
+
+        self.layout.addSpacing(2)
+
+        # choices are (stored value, display text) pairs
+        self.input = QComboBox()
+        for value, text in choices:
+            self.input.addItem(text, value)
+        self.input.setFixedSize(width, 37)
+        self.layout.addWidget(self.input)
+
+    def value(self):
+        return self.input.currentData()
+
+    def set_value(self, value):
+        index = self.input.findData(value)
+        self.input.setCurrentIndex(max(index, 0))
+
+    def set_light_mode(self):
+        self.label.setStyleSheet("color: #434343; font-size: 18px; font-weight: 520; padding-left: 1px;")
+        self.input.setStyleSheet("padding-left: 8px; border: 1px solid #A381B1; border-radius: 10px;"
+                                 "color: black; font-weight: 500; font-size: 16px;")
+
+    def set_dark_mode(self):
+        self.label.setStyleSheet("color: #A590CB; font-size: 18px; font-weight: 520; padding-left: 1px;")
+        self.input.setStyleSheet("padding-left: 8px; border: 1px solid #5d5d5d; border-radius: 10px;"
+                                 "color: #C4C4C4; font-weight: 500; font-size: 16px;")
+
+
 class TwoRowLabel(QWidget):
     def __init__(self, l1, l2):
         super().__init__()
@@ -377,6 +433,36 @@ class ConnectionRowWidget(QWidget):
         self.inputs_r2.addWidget(self.password)
         self.inputs_r2.addWidget(self.port)
         self.inputs_vbox_layout.addLayout(self.inputs_r2)
+        self.inputs_r3 = QHBoxLayout()
+        self.profile = FormCombo("Performance Profile", 600, PROFILE_CHOICES)
+        self.inputs_r3.addWidget(self.profile)
+        self.inputs_vbox_layout.addLayout(self.inputs_r3)
+        self.inputs_r4 = QHBoxLayout()
+        self.inputs_r4.setSpacing(10)
+        # Caps for file downloads; the second applies for a moment after a command is sent to the shell
+        self.bulk_rate = FormCombo("Transfer Speed Cap", 285, RATE_CHOICES)
+        self.yield_rate = FormCombo("Cap Right After Typing", 285, RATE_CHOICES)
+        self.inputs_r4.addWidget(self.bulk_rate)
+        self.inputs_r4.addWidget(self.yield_rate)
+        self.inputs_vbox_layout.addLayout(self.inputs_r4)
+        self.inputs_r5 = QHBoxLayout()
+        self.inputs_r5.setSpacing(10)
+        # Optional bastion, same form as ssh -J; an empty password uses the local agent
+        self.jump_host = FormItem("Jump Host (user@host:port)", 365)
+        self.jump_password = FormItem("Jump Host Password", 205)
+        self.inputs_r5.addWidget(self.jump_host)
+        self.inputs_r5.addWidget(self.jump_password)
+        self.inputs_vbox_layout.addLayout(self.inputs_r5)
+        self.inputs_r6 = QHBoxLayout()
+        self.inputs_r6.setSpacing(10)
+        # File tree scan: skipped names (a pattern with "/" matches a path under home) and size limits
+        self.tree_excludes = FormItem("File Tree Exclusions", 365)
+        self.tree_max_depth = FormItem("Max Depth", 100)
+        self.tree_dir_cap = FormItem("Files Per Folder", 115)
+        self.inputs_r6.addWidget(self.tree_excludes)
+        self.inputs_r6.addWidget(self.tree_max_depth)
+        self.inputs_r6.addWidget(self.tree_dir_cap)
+        self.inputs_vbox_layout.addLayout(self.inputs_r6)
 
         self.layout.addWidget(self.inputs_vbox)
 
@@ -386,6 +472,14 @@ class ConnectionRowWidget(QWidget):
         self.ip.set_light_mode()
         self.password.set_light_mode()
         self.port.set_light_mode()
+        self.profile.set_light_mode()
+        self.bulk_rate.set_light_mode()
+        self.yield_rate.set_light_mode()
+        self.jump_host.set_light_mode()
+        self.jump_password.set_light_mode()
+        self.tree_excludes.set_light_mode()
+        self.tree_max_depth.set_light_mode()
+        self.tree_dir_cap.set_light_mode()
 
     def set_dark_mode(self):
         self.label_side.set_dark_mode()
@@ -393,6 +487,14 @@ class ConnectionRowWidget(QWidget):
         self.ip.set_dark_mode()
         self.password.set_dark_mode()
         self.port.set_dark_mode()
+        self.profile.set_dark_mode()
+        self.bulk_rate.set_dark_mode()
+        self.yield_rate.set_dark_mode()
+        self.jump_host.set_dark_mode()
+        self.jump_password.set_dark_mode()
+        self.tree_excludes.set_dark_mode()
+        self.tree_max_depth.set_dark_mode()
+        self.tree_dir_cap.set_dark_mode()
 
 class IntegrationsRowWidget(QWidget):
     def __init__(self):
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Author: Sam Grouchnikov
+License: GPL-3.0
+Version: 1.2.1
+Email: sam.grouchnikov@gmail.com
+Status: Development
+"""
+
+from PyQt6.QtCore import Qt, QTimer, QEvent
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QScrollBar, QLineEdit, QPushButton, QLabel
+)
+
+from backend.ssh.sshManager import collapse_progress_frames
+
+# Lines pulled from disk per page; only this window is ever held by the widget
+PAGE_LINES = 400
+
+
+class SpoolViewer(QDialog):
+    """Pages through a spooled command output straight from disk, following it while it grows."""
+
+    def __init__(self, spool, is_dark=False, parent=None):
+        super().__init__(parent)
+        self.spool = spool
+        self.first_line = 0
+        self.search_offset = 0
+        self.setWindowTitle(f"Output: {spool.command}" if spool.command else "Output")
+        self.resize(1000, 700)
+
+        layout = QVBoxLayout(self)
+
+        search_row = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search output...")
+        self.search_input.returnPressed.connect(self.find_next)
+        self.find_btn = QPushButton("Find Next")
+        self.find_btn.clicked.connect(self.find_next)
+        search_row.addWidget(self.search_input)
+        search_row.addWidget(self.find_btn)
+        layout.addLayout(search_row)
+
+        text_row = QHBoxLayout()
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.text.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.text.viewport().installEventFilter(self)
+        # The scrollbar spans every line on disk, not just the loaded page
+        self.scrollbar = QScrollBar(Qt.Orientation.Vertical)
+        self.scrollbar.valueChanged.connect(self.load_page)
+        text_row.addWidget(self.text)
+        text_row.addWidget(self.scrollbar)
+        layout.addLayout(text_row)
+
+        self.info_label = QLabel()
+        layout.addWidget(self.info_label)
+
+        if is_dark:
+            self.setStyleSheet("background-color: #1E1B26; color: #C4C4C4;")
+            self.text.setStyleSheet("font-family: 'Consolas', 'Monospace', 'Courier New'; font-size: 14px;"
+                                    "background-color: #151219; color: #E0E0E0;")
+        else:
+            self.text.setStyleSheet("font-family: 'Consolas', 'Monospace', 'Courier New'; font-size: 14px;")
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(500)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh(follow=True)
+
+    def visible_lines(self):
+        return max(self.text.viewport().height() // max(self.text.fontMetrics().height(), 1), 1)
+
+    def refresh(self, follow=False):
+        total = self.spool.line_count()
+        at_bottom = self.scrollbar.value() >= self.scrollbar.maximum()
+        self.scrollbar.setMaximum(max(total - self.visible_lines(), 0))
+        self.scrollbar.setPageStep(self.visible_lines())
+        if follow or at_bottom:
+            self.scrollbar.setValue(self.scrollbar.maximum())
+        self.info_label.setText(f"{total:,} lines, {self.spool.size() / (1024 * 1024):.1f} MB - {self.spool.path}")
+
+    def load_page(self, first_line):
+        self.first_line = first_line
+        text = self.spool.read_lines(first_line, PAGE_LINES)
+        self.text.setPlainText(collapse_progress_frames(text))
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Wheel:
+            steps = -event.angleDelta().y() // 40
+            self.scrollbar.setValue(self.scrollbar.value() + steps)
+            return True
+        return super().eventFilter(obj, event)
+
+    def find_next(self):
+        needle = self.search_input.text()
+        if not needle:
+            return
+        offset = self.spool.search(needle, self.search_offset)
+        if offset == -1 and self.search_offset:
+            # Wrap around to the top
+            offset = self.spool.search(needle, 0)
+        if offset == -1:
+            self.info_label.setText(f"No match for '{needle}'")
+            return
+        self.search_offset = offset + 1
+
+        line = self.spool.line_at(offset)
+        self.scrollbar.setValue(min(line, self.scrollbar.maximum()))
+        self.highlight(needle, line - self.first_line)
+
+    def highlight(self, needle, row):
+        block = self.text.document().findBlockByNumber(row)
+        index = block.text().lower().find(needle.lower())
+        if index == -1:
+            return
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + index)
+        cursor.setPosition(block.position() + index + len(needle), QTextCursor.MoveMode.KeepAnchor)
+        self.text.setTextCursor(cursor)
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
@@ -8,17 +8,29 @@ Version: 1.2.1
 Email: sam.grouchnikov@gmail.com
 Status: Development
 """
+import shlex
 from datetime import datetime
 
 from PyQt6.QtCore import Qt, QCoreApplication, QSize
 from PyQt6.QtGui import QIcon, QPixmap, QCursor
 from PyQt6.QtWidgets import (
-    QVBoxLayout, QLabel, QSizePolicy, QStackedWidget, QWidget, QHBoxLayout, QFrame, QPushButton, QMainWindow
+    QVBoxLayout, QLabel, QSizePolicy, QStackedWidget, QWidget, QHBoxLayout, QFrame, QPushButton, QMainWindow,
+    QInputDialog
 )
 from urllib.parse import urlparse
 
 
-from backend.ssh.sshManager import SSHStreamWorker, SSHManager
+from backend.ssh.detachedRuns import LAUNCH_MODES, detached_command, list_runs_command, log_path, make_run_name, parse_runs
+from backend.ssh.fleetManager import FleetManager, SSHFleetWorker, parse_fleet_hosts
+from backend.ssh.jobQueue import CommandJob, JobQueue, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_NORMAL
+from backend.ssh.outputSpool import create_spool
+from backend.ssh.remoteListing import (
+    DEFAULT_DIR_CAP, DEFAULT_MAX_DEPTH, build_find_command, parse_excludes, parse_limit
+)
+from backend.ssh.sshManager import (
+    SSHCaptureWorker, SSHStreamWorker, SSHManager, SSHLivenessMonitor, SSHLinkProbeWorker, SSHTailWorker
+)
+from backend.ssh.transportProfiles import PROFILES
 from gui.navbar import SideNavBar
 from gui.projectSettings.pages.FileTree import FileTreePage
 from gui.projectSettings.pages.SimpleSSH import SimpleSSHPage
@@ -213,7 +225,16 @@ class ProjectSettingsSkeleton(QMainWindow):
         # 3. Apply the Styles
 
 
-        self.tree_data_accumulator = ""
+        self.worker = None
+        self.liveness_monitor = None
+        self.link_probe = None
+        self.tail_worker = None
+        self.fleet = None
+        self.fleet_worker = None
+        self.background_workers = set()
+        # Interactive shell runs one job at a time; exec-channel jobs run a few in parallel
+        self.shell_queue = JobQueue(max_running=1)
+        self.background_queue = JobQueue(max_running=4)
 
         self.profile_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
         self.sidebar_layout.addWidget(self.profile_btn)
@@ -223,7 +244,18 @@ class ProjectSettingsSkeleton(QMainWindow):
         self.stack = QStackedWidget(self)
         self.config = None
 
-        self.cmd_page = cmdPage(self.ssh_manager, self.global_run_command, self.global_handle_connect, self.setup_environment)
+        # Menu entries call these directly, so nothing typed into the console can trigger them
+        menu_actions = {
+            "run_detached": self.launch_detached,
+            "reattach_run": self.reattach_run,
+            "tail_log": self.start_tail,
+            "stop_tail": self.stop_tail,
+            "probe_link": self.probe_link,
+            "run_fleet": self.run_on_fleet,
+            "cancel_queued": self.cancel_queued,
+        }
+        self.cmd_page = cmdPage(self.ssh_manager, self.global_run_command, self.global_handle_connect, self.setup_environment,
+                                menu_actions)
         self.file_tree_page = FileTreePage(self.global_run_command, self.home_dir, self.config, self.ssh_manager, self.update_tree)
         self.settings_page = SettingsPage(self.config, self.reload_manager, self.fb)
         self.graph_page = GraphsPage(self.config)
@@ -269,13 +301,18 @@ class ProjectSettingsSkeleton(QMainWindow):
     def load_settings(self):
         self.settings_page.load_parts(self.config)
 
+    def build_manager(self):
+        return SSHManager(self.config.get("ssh_ip"), self.config.get("ssh_user"), self.config.get("ssh_port"),
+                          self.config.get("ssh_psw"), profile=self.config.get("ssh_profile"),
+                          bulk_rate=self.config.get("bulk_rate_limit", 0),
+                          yield_rate=self.config.get("bulk_yield_rate", 1),
+                          jump_host=self.config.get("jump_host"), jump_password=self.config.get("jump_psw"),
+                          tree_excludes=parse_excludes(self.config.get("tree_excludes")))
+
     def reload_manager(self):
-        server_new = self.config.get("ssh_ip")
-        user_new = self.config.get("ssh_user")
-        port_new = self.config.get("ssh_port")
-        psw_new = self.config.get("ssh_psw")
-        self.ssh_manager = SSHManager(server_new, user_new, port_new, psw_new)
+        self.ssh_manager = self.build_manager()
         self.cmd_page.reload_manager(self.ssh_manager)
+        self.file_tree_page.reload_manager(self.ssh_manager)
 
     def global_handle_connect(self):
         self.cmd_page.connect_btn.setText(" Connecting")
@@ -286,8 +323,9 @@ class ProjectSettingsSkeleton(QMainWindow):
             port_new = self.config.get("ssh_port")
             psw_new = self.config.get("ssh_psw")
             print(server_new, " ", user_new, " ", port_new, " ", psw_new)
-            self.ssh_manager = SSHManager(server_new, user_new, port_new, psw_new)
+            self.ssh_manager = self.build_manager()
             self.cmd_page.reload_manager(self.ssh_manager)
+            self.file_tree_page.reload_manager(self.ssh_manager)
 
         success, msg = self.ssh_manager.connect()
         self.cmd_page.add_message(f"System: {msg}")
@@ -295,29 +333,176 @@ class ProjectSettingsSkeleton(QMainWindow):
         self.cmd_page.update_connection_status(success)
 
         if success:
-            new_path = self.ssh_manager.get_pwd_silently()
+            # The shell reports its starting directory in the ready marker
+            new_path = self.ssh_manager.home
             self.home_dir = new_path
             self.current_dir = new_path
 
             # 2. Update UI displays
             self.file_tree_page.update_home(new_path)
             self.cmd_page.update_directory_display(new_path)
-            find_cmd = "find . -not -path '*/.*' -not -path '*__pycache__*' -not -path '*venv*' -not -path '*wandb*'"
-            self.global_run_command(find_cmd, is_tree_update=True)
+            self.update_tree()
 
-            new_path = self.ssh_manager.get_pwd_silently()
-            self.home_dir = new_path
-            self.file_tree_page.update_home(new_path)
-            self.current_dir = new_path
-            self.cmd_page.update_directory_display(new_path)
             self.cmd_page.connect_btn.setText(" Connect")
             self.cmd_page.connect_btn.setEnabled(False)
             self.cmd_page.send_btn.setEnabled(True)
+            self.start_liveness_monitor()
         else:
             self.cmd_page.connect_btn.setText(" Connect")
 
+    def start_liveness_monitor(self):
+        self.stop_liveness_monitor()
+        self.liveness_monitor = SSHLivenessMonitor(self.ssh_manager)
+        self.liveness_monitor.connection_changed.connect(self.cmd_page.update_connection_status)
+        self.liveness_monitor.reconnected.connect(lambda msg: self.cmd_page.add_message(f"System: Reconnected - {msg}"))
+        self.liveness_monitor.start()
+
+    def stop_liveness_monitor(self):
+        if self.liveness_monitor:
+            self.liveness_monitor.stop()
+            self.liveness_monitor.wait()
+            self.liveness_monitor = None
+
+    def start_tail(self, path=None):
+        if not self.ssh_manager or not self.ssh_manager.is_active():
+            self.cmd_page.add_message("System: Connect first to attach to a log file")
+            return
+        if path is None:
+            path, ok = QInputDialog.getText(self, "Attach to Log File", "Remote log file path:")
+            if not ok or not path.strip():
+                return
+            path = path.strip()
+        self.stop_tail()
+
+        self.cmd_page.add_message(f"Following {path}")
+        bubble = self.cmd_page.create_new_output_bubble()
+        self.tail_worker = SSHTailWorker(self.ssh_manager, path)
+        self.tail_worker.output_received.connect(lambda text: self.cmd_page.update_live_output(text, bubble))
+        self.tail_worker.start()
+
+    def launch_detached(self, command=None, mode=None):
+        """Starts a detached run and tails its log; asks for whichever of command and mode is missing."""
+        if not self.ssh_manager or not self.ssh_manager.is_active():
+            self.cmd_page.add_message("System: Connect first to launch a run")
+            return
+        if command is None:
+            command, ok = QInputDialog.getText(self, "Run Detached", "Command to run in the current directory:",
+                                               text="python3 train.py")
+            if not ok or not command.strip():
+                return
+        if mode is None:
+            mode, ok = QInputDialog.getItem(self, "Run Detached", "Launch with:", LAUNCH_MODES, 0, False)
+            if not ok:
+                return
+
+        name = make_run_name(command.strip())
+        self.global_run_command(detached_command(command.strip(), name, mode))
+        # The tail waits for the log file to appear, so it can start right away
+        self.start_tail(log_path(name))
+
+    def reattach_run(self):
+        if not self.ssh_manager or not self.ssh_manager.is_active():
+            self.cmd_page.add_message("System: Connect first to reattach to a run")
+            return
+        worker = SSHCaptureWorker(self.ssh_manager, list_runs_command(), timeout=30)
+        worker.completed.connect(lambda result: self.choose_run(parse_runs(result.text)))
+        worker.failed.connect(lambda msg: self.cmd_page.add_message(f"System: Could not list runs - {msg}"))
+        worker.finished.connect(lambda: self.release_worker(worker))
+        self.background_workers.add(worker)
+        worker.start()
+
+    def choose_run(self, runs):
+        if not runs:
+            self.cmd_page.add_message("System: No detached runs found on the server")
+            return
+        labels = [f"{name} ({status})" for name, status in runs]
+        choice, ok = QInputDialog.getItem(self, "Reattach to Run", "Run:", labels, 0, False)
+        if ok:
+            # Same path as before, so a run followed earlier in this session resumes at its saved offset
+            self.start_tail(log_path(runs[labels.index(choice)][0]))
+
+    def stop_tail(self):
+        if self.tail_worker:
+            self.tail_worker.stop()
+            self.tail_worker.wait()
+            self.cmd_page.add_message(f"Stopped following {self.tail_worker.path}")
+            self.tail_worker = None
+
+    def probe_link(self):
+        if self.link_probe and self.link_probe.isRunning():
+            return
+        if not self.ssh_manager or not self.ssh_manager.is_active():
+            self.cmd_page.add_message("System: Connect first to measure the link")
+            return
+        self.cmd_page.add_message("System: Measuring round-trip time and throughput...")
+        self.link_probe = SSHLinkProbeWorker(self.ssh_manager)
+        self.link_probe.result_ready.connect(self.show_link_probe)
+        self.link_probe.failed.connect(lambda msg: self.cmd_page.add_message(f"System: Link probe failed - {msg}"))
+        self.link_probe.start()
+
+    def show_link_probe(self, result):
+        current = PROFILES.get(self.ssh_manager.profile)
+        recommended = PROFILES[result["recommended"]]
+        buffers = f" ({result['socket_buffers']})" if result["socket_buffers"] else ""
+        self.cmd_page.add_message(
+            f"System: RTT {result['rtt_ms']:.0f} ms, {result['mb_per_s']:.1f} MB/s{buffers} - "
+            f"recommended profile: {recommended.label} (current: {current.label if current else 'Default'}). "
+            f"Change it under Settings > Connection.")
+
+    def run_on_fleet(self):
+        if self.fleet_worker and self.fleet_worker.isRunning():
+            self.cmd_page.add_message("System: A fleet command is still running")
+            return
+        hosts_text, ok = QInputDialog.getText(self, "Run on Fleet", "Hosts ([user@]host[:port], comma separated):",
+                                              text=self.config.get("fleet_hosts", ""))
+        hosts = parse_fleet_hosts(hosts_text) if ok else []
+        if not hosts:
+            return
+        command, ok = QInputDialog.getText(self, "Run on Fleet", f"Command to run on {len(hosts)} host(s):",
+                                           text="nvidia-smi")
+        if not ok or not command.strip():
+            return
+
+        if hosts_text != self.config.get("fleet_hosts"):
+            self.config["fleet_hosts"] = hosts_text
+            self.fb.set_doc(self.doc_path, self.config)
+        # Connections are kept between runs; a different host list starts a new fleet
+        if self.fleet is None or self.fleet.hosts != hosts:
+            self.close_fleet()
+            self.fleet = FleetManager(hosts, self.config.get("ssh_user"), self.config.get("ssh_port"),
+                                      self.config.get("ssh_psw"), profile=self.config.get("ssh_profile"),
+                                      jump_host=self.config.get("jump_host"),
+                                      jump_password=self.config.get("jump_psw"))
+
+        spool = create_spool(f"fleet: {command}")
+        self.cmd_page.set_spool(spool)
+        self.cmd_page.add_message(f"$ [{len(hosts)} hosts] {command}")
+        self.cmd_page.create_new_output_bubble()
+        self.fleet_worker = SSHFleetWorker(self.fleet, command.strip(), spool=spool)
+        self.fleet_worker.output_received.connect(self.cmd_page.update_live_output)
+        self.fleet_worker.failed.connect(lambda msg: self.cmd_page.add_message(f"System: Fleet command failed - {msg}"))
+        self.fleet_worker.finished.connect(
+            lambda: self.cmd_page.add_message(
+                f"System: Fleet command finished on {len(hosts)} host(s)"
+                + (" with failures" if self.fleet_worker.exit_code else "")))
+        self.fleet_worker.start()
+
+    def close_fleet(self):
+        if self.fleet_worker and self.fleet_worker.isRunning():
+            self.fleet_worker.stop()
+            self.fleet_worker.wait()
+        if self.fleet:
+            self.fleet.close()
+            self.fleet = None
+
     def update_tree(self):
-        find_cmd = "find . -not -path '*/.*' -not -path '*__pycache__*' -not -path '*venv*' -not -path '*wandb*'"
+        self.file_tree_page.model.dir_cap = parse_limit(self.config.get("tree_dir_cap"), DEFAULT_DIR_CAP)
+        # Lists only the top level over SFTP, folders load as they are expanded;
+        # servers without SFTP get one find scan of the whole tree instead
+        if self.file_tree_page.load_root():
+            return
+        find_cmd = build_find_command(self.ssh_manager.tree_excludes,
+                                      parse_limit(self.config.get("tree_max_depth"), DEFAULT_MAX_DEPTH))
         self.global_run_command(find_cmd, is_tree_update=True)
 
     def setup_environment(self):
@@ -325,26 +510,81 @@ class ProjectSettingsSkeleton(QMainWindow):
         git_pat = self.config.get("git_pat")
         git_repo = self.config.get("git_url")
 
-        wandb_cmd = f"export WANDB_API_KEY={wandb_api_key}"
-
-        # Chain it with your other commands in one session
-        full_setup = f"{wandb_cmd} && git clone https://{git_pat}@{git_repo.split('https://')[-1]}"
-
-        self.global_run_command(full_setup, is_setup=True)
-        self.update_tree()
-
-
-    def accumulate_tree_data(self, text):
-        self.tree_data_accumulator += text
-
-    def global_run_command(self, command, is_tree_update=False, is_file_read=False, is_file_save=False, is_git_clone=False, is_setup=False):
-        self.recent_cmd = command
-        self.cmd_page.send_btn.setEnabled(False)
-        cd_fail = False
-        prev_dir = None
-        is_cd_cmd = command.startswith("cd ")
-
+        # Labels are what the console shows, keeping the key and token out of it
+        steps = []
+        if wandb_api_key:
+            # Replayed into the new shell if the connection drops and is re-established
+            self.ssh_manager.session_env["WANDB_API_KEY"] = wandb_api_key
+            steps.append(("export WANDB_API_KEY", f"export WANDB_API_KEY={shlex.quote(wandb_api_key)}"))
+        if git_repo:
+            steps.append((f"git clone {git_repo}", f"git clone https://{git_pat}@{git_repo.split('https://')[-1]}"))
+        if not steps:
+            self.cmd_page.add_message("System: Set a W&B API key or a Git repository URL in Settings first")
+            return
+        self.global_run_command("Easy-SSH Auto Environment Setup", is_setup=True, steps=steps)
+
+
+    def run_background_command(self, job):
+        """Runs tree scans, file reads and saves on their own exec channels, in parallel with the shell."""
+        is_tree_update = job.options.get("is_tree_update", False)
+        is_file_read = job.options.get("is_file_read", False)
+        is_file_save = job.options.get("is_file_save", False)
+        is_status = job.options.get("is_status", False)
+
+        kind = ("tree scan" if is_tree_update else "file read" if is_file_read else "file save" if is_file_save
+                else "status" if is_status else "exec")
+        # stdout and stderr come back separately, so error text never ends up in the tree or the editor
+        worker = SSHCaptureWorker(self.ssh_manager, job.command, stdin=job.options.get("stdin"), kind=kind,
+                                  stream_stdout=is_tree_update)
+        self.background_workers.add(worker)
+        if is_tree_update:
+            # The tree grows line by line while find runs; later scans update the existing
+            # items in place, so expanded folders stay open
+            scan = self.file_tree_page.start_tree_scan()
+            worker.stdout_received.connect(scan.feed)
+            # Only a scan that ran to the end may remove what it did not list
+            worker.completed.connect(lambda result: scan.finish(result.exit_status is not None))
+            worker.failed.connect(lambda _msg: scan.finish(False))
+        worker.completed.connect(lambda result: self.background_finished(kind, result))
+        worker.failed.connect(lambda msg: self.cmd_page.add_message(f"System: {kind} failed - {msg}"))
+
+        worker.finished.connect(lambda: self.release_worker(worker))
+        if not is_status:
+            # A status check runs beside the shell lane, so it must not mark the console idle
+            worker.finished.connect(lambda: self.global_finished(is_tree_update, is_file_read, is_file_save))
+        self.start_job(worker, self.background_queue, job)
+
+    def background_finished(self, kind, result):
+        if kind == "file read":
+            if result.ok:
+                self.file_tree_page.display_file_content(result.text)
+            else:
+                self.file_tree_page.show_file_error(result.describe_error())
+        elif kind == "file save" and not result.ok:
+            self.cmd_page.add_message(f"System: Save failed - {result.describe_error()}")
+        elif kind == "status":
+            self.cmd_page.add_message(f"$ {result.command}")
+            bubble = self.cmd_page.create_new_output_bubble()
+            text = result.text if result.ok else result.describe_error()
+            self.cmd_page.update_live_output(text.rstrip("\n"), bubble)
+
+    def global_run_command(self, command, is_tree_update=False, is_file_read=False, is_file_save=False, is_git_clone=False,
+                           is_setup=False, priority=None, steps=None, stdin=None, detached_mode=None,
+                           is_status=False):
+        """
+        Queues a command. With steps, command is only the console label and the steps
+        run as one pipelined batch that stops at the first failure. A detached_mode from
+        LAUNCH_MODES launches the command as a detached run instead. is_status runs a
+        read-only check on the background lane and prints its result to the console.
+        """
         if command == "exit":
+            self.shell_queue.cancel_all()
+            self.background_queue.cancel_all()
+            self.update_queue_status()
+            self.stop_liveness_monitor()
+            self.stop_tail()
+            self.close_fleet()
+
             # 1. Close the backend connection
             self.ssh_manager.close()
 
@@ -355,7 +595,7 @@ class ProjectSettingsSkeleton(QMainWindow):
 
             self.cmd_page.connect_btn.setText("Connect")
             self.cmd_page.connect_btn.setEnabled(True)
-            self.file_tree_page.rebuild_tree("")
+            self.file_tree_page.clear_tree()
             self.file_tree_page.reset_editor_text()
             self.file_tree_page.file_name_label.setText("No File Selected")
             return
@@ -364,37 +604,113 @@ class ProjectSettingsSkeleton(QMainWindow):
             self.ssh_manager.send_interrupt()
             return
 
-        if hasattr(self, 'worker') and self.worker and self.worker.isRunning():
+        if detached_mode:
+            self.launch_detached(command, detached_mode)
             return
-        self.worker = SSHStreamWorker(self.ssh_manager, command)
 
-        if is_cd_cmd:
-            prev_dir = self.current_dir
+        is_background = is_tree_update or is_file_read or is_file_save or is_status
+        if priority is None:
+            if is_tree_update:
+                priority = PRIORITY_BACKGROUND
+            elif is_background or is_setup or is_git_clone:
+                priority = PRIORITY_NORMAL
+            else:
+                priority = PRIORITY_INTERACTIVE
+
+        # Repeated tree refreshes collapse into a single pending scan
+        job = CommandJob(command, priority, key="update_tree" if is_tree_update else None,
+                         is_tree_update=is_tree_update, is_file_read=is_file_read, is_file_save=is_file_save,
+                         is_git_clone=is_git_clone, is_setup=is_setup, steps=steps, stdin=stdin, is_status=is_status)
+        queue = self.background_queue if is_background else self.shell_queue
+        job = queue.push(job)
+        self.dispatch_jobs()
+        return job
+
+    def cancel_queued(self):
+        # Shell lane only: pending file saves and tree refreshes must still go through
+        cancelled = self.shell_queue.cancel_all()
+        self.cmd_page.add_message(f"System: Cancelled {cancelled} queued command(s)")
+        self.update_queue_status()
+
+    def dispatch_jobs(self):
+        """Starts as many queued jobs as each lane allows."""
+        job = self.background_queue.pop()
+        while job is not None:
+            self.run_background_command(job)
+            job = self.background_queue.pop()
+
+        job = self.shell_queue.pop()
+        if job is not None:
+            self.run_shell_command(job)
+
+        self.update_queue_status()
+
+    def release_worker(self, worker):
+        # The workers' finished is emitted from inside run(); the thread returns right after,
+        # and dropping the last reference before then would destroy a running QThread
+        worker.wait()
+        self.background_workers.discard(worker)
+        worker.deleteLater()
+
+    def start_job(self, worker, queue, job):
+        # Connected last so the job's own finished handlers run before the next job starts
+        def _release():
+            # The next shell job replaces self.worker, so this thread has to have returned
+            worker.wait()
+            queue.finish(job)
+            self.dispatch_jobs()
+
+        worker.finished.connect(_release)
+        worker.metrics.queue_wait_ms = job.wait_time() * 1000
+        worker.start()
+
+    def update_queue_status(self):
+        self.cmd_page.update_queue_status(self.shell_queue.stats(), self.background_queue.stats())
+
+    def run_shell_command(self, job):
+        command = job.command
+        is_tree_update = False
+        is_file_read = False
+        is_file_save = False
+        is_git_clone = job.options.get("is_git_clone", False)
+        is_setup = job.options.get("is_setup", False)
+
+        self.recent_cmd = command
+        is_cd_cmd = command.startswith("cd ")
 
-            parts = command.split(" ", 1)
-            appended = parts[1].strip() if len(parts) > 1 else ""
-            if appended == "~":
-                self.current_dir = self.home_dir
-            elif appended:
-                self.current_dir = f"{self.current_dir}/{appended}".replace("//", "/")
+        # Every shell command's output is kept on disk; the console only holds a tail
+        spool = create_spool(command)
+        self.cmd_page.set_spool(spool)
+        steps = job.options.get("steps")
+        self.worker = SSHStreamWorker(self.ssh_manager, command, spool=spool, steps=steps)
+        self.worker.failed.connect(lambda msg: self.cmd_page.add_message(f"System: Command failed - {msg}"))
+
+        if steps:
+            self.cmd_page.add_message(command if is_setup else f"$ {command}")
+            self.cmd_page.create_new_output_bubble()
+            self.worker.output_received.connect(self.cmd_page.update_live_output)
+            self.worker.finished.connect(
+                lambda: self.global_finished(is_tree_update, is_file_read, is_file_save, is_git_clone)
+            )
+            if is_setup:
+                # The tree scan runs on its own channel, so wait for the clone to land first
+                self.worker.finished.connect(self.update_tree)
+            self.start_job(self.worker, self.shell_queue, job)
+            return
 
+        if is_cd_cmd:
             self.cmd_page.add_message(f"$ {command}")
 
-            # Detect failure from streamed output
             def _cd_output_probe(text: str):
-                nonlocal cd_fail
-                if "can't cd to" in text.lower() or "no such file or directory" in text.lower():
-                    cd_fail = True
                 self.cmd_page.create_new_output_bubble()
                 self.cmd_page.update_live_output(text)
 
             self.worker.output_received.connect(_cd_output_probe)
 
             self.worker.finished.connect(
-                lambda: self.global_finished(is_tree_update, is_file_read, is_file_save, is_git_clone, cd_fail,
-                                             prev_dir)
+                lambda: self.global_finished(is_tree_update, is_file_read, is_file_save, is_git_clone)
             )
-            self.worker.start()
+            self.start_job(self.worker, self.shell_queue, job)
             return
 
         if command.startswith("rm"):
@@ -402,8 +718,8 @@ class ProjectSettingsSkeleton(QMainWindow):
             self.worker.finished.connect(
                 lambda: self.global_finished(is_tree_update, is_file_read, is_file_save, is_git_clone)
             )
-            self.worker.start()
-            self.update_tree()
+            self.worker.finished.connect(self.update_tree)
+            self.start_job(self.worker, self.shell_queue, job)
             return
 
         if command.startswith("export"):
@@ -412,25 +728,14 @@ class ProjectSettingsSkeleton(QMainWindow):
             self.worker.finished.connect(
                 lambda: self.global_finished(is_tree_update, is_file_read, is_file_save, is_git_clone)
             )
-            self.worker.start()
+            self.start_job(self.worker, self.shell_queue, job)
             self.cmd_page.create_new_output_bubble()
             self.cmd_page.update_live_output("Status: Success!")
             return
 
 
 
-        if is_tree_update or is_setup or command.startswith("rm"):
-            self.tree_data_accumulator = ""
-
-            self.worker.output_received.connect(self.accumulate_tree_data)
-
-            self.worker.finished.connect(
-                lambda: self.file_tree_page.rebuild_tree(self.tree_data_accumulator),
-                Qt.ConnectionType.QueuedConnection
-            )
-        elif is_file_save:
-            pass
-        elif is_setup:
+        if is_setup:
             command = f"$ {command}"
 
             self.cmd_page.add_message(command)
@@ -442,41 +747,26 @@ class ProjectSettingsSkeleton(QMainWindow):
             self.graph_page.refresh_runs()
             pass
 
-        elif is_file_read:
-            # Clear the editor first
-            self.file_tree_page.editor.clear()
-            # Connect output DIRECTLY to the editor's append function
-            self.worker.output_received.connect(self.file_tree_page.display_file_content)
         else:
             self.cmd_page.add_message(f"$ {command}")
             self.cmd_page.create_new_output_bubble()
-
-            def _output_probe(text: str):
-                nonlocal cd_fail
-                if "can't cd to" in text.lower():
-                    cd_fail = True
-                else:
-                    self.cmd_page.update_live_output(text)
-
-            self.worker.output_received.connect(_output_probe)
+            self.worker.output_received.connect(self.cmd_page.update_live_output)
 
         self.worker.finished.connect(
-            lambda: self.global_finished(is_tree_update, is_file_read, is_file_save, is_git_clone, cd_fail)
+            lambda: self.global_finished(is_tree_update, is_file_read, is_file_save, is_git_clone)
         )
 
-        self.worker.start()
+        self.start_job(self.worker, self.shell_queue, job)
 
-    def global_finished(self, is_tree_update=False, is_file_read=False, is_file_save=False, is_git_clone=False, cd_fail=False
-                        , prev_dir=None):
+    def global_finished(self, is_tree_update=False, is_file_read=False, is_file_save=False, is_git_clone=False):
         if is_tree_update or is_file_read or is_file_save or is_git_clone:
             self.cmd_page.update_directory_display(self.current_dir)
             return
 
-        if cd_fail and prev_dir is not None:
-            self.current_dir = prev_dir
-            self.cmd_page.update_directory_display(self.current_dir)
-        else:
-            self.cmd_page.update_directory_display(self.current_dir)
+        # The end marker of every shell command carries the shell's real $PWD
+        if self.ssh_manager.cwd:
+            self.current_dir = self.ssh_manager.cwd
+        self.cmd_page.update_directory_display(self.current_dir)
 
         cmd_start = self.recent_cmd.split(' ')[0]
         add_bubble = cmd_start not in ["cat", "ssh", "find"]